@@ -0,0 +1,11 @@
+"""
+Single .env bootstrap for the application
+Importing this module loads the .env file once per process
+"""
+
+import os
+from dotenv import load_dotenv
+
+if not os.getenv("_DOTENV_LOADED"):
+    load_dotenv()
+    os.environ["_DOTENV_LOADED"] = "1"
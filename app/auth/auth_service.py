@@ -5,27 +5,64 @@ Main entry point for all authentication operations
 
 from typing import Optional, Dict, Any, Tuple
 import streamlit as st
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime
 
 from .jwt_manager import JWTManager
-from .redmine_client import RedmineClient
-from ..models.user import UserManager, User
+from .redmine_client import RedmineClient, get_redmine_client
+from ..models.user import get_user_manager, User
 import os
-from dotenv import load_dotenv
+from . import _env  # Loads .env once per process
 
-load_dotenv()
+_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/cv_converter.db")
+
+# Seconds a refreshed token is handed to concurrent callers refreshing the same token
+REFRESH_REUSE_SECONDS = 5
+REFRESH_EVICT_SECONDS = 10
+
+# Seconds a resolved user is served from session state before the token is checked again
+CURRENT_USER_TTL_SECONDS = 300
+
+# Session state keys holding the user's personal Redmine API key
+API_KEY_SESSION_KEYS = ("redmine_api_key",)
+
+# Session state keys cleared on logout
+AUTH_SESSION_KEYS = (
+    "jwt_token", "user_id", "username", "user_role",
+    "_current_user_cache", "_current_user_cache_token", "_current_user_cache_until",
+) + API_KEY_SESSION_KEYS
+
+def _purge_session(keys: Tuple[str, ...]):
+    """Remove keys from session state, ignoring missing ones"""
+    for key in keys:
+        st.session_state.pop(key, None)
 
 class AuthService:
-    """Main authentication service handling login, session management, and user operations"""
+    """
+    Main authentication service handling login, session management, and user operations
+    
+    Per-user state lives in st.session_state, so a single instance is shared
+    by all sessions; obtain it with get_auth_service()
+    """
     
     def __init__(self):
         """Initialize authentication service with required components"""
         self.jwt_manager = JWTManager()
-        self.redmine_client = RedmineClient()
         
         # Initialize user manager with database path from environment
-        db_path = os.getenv("SQLITE_DB_PATH", "data/cv_converter.db")
-        self.user_manager = UserManager(db_path)
+        self.user_manager = get_user_manager(_DB_PATH)
+        
+        # Coalesce overlapping refreshes of the same token across reruns
+        self._refresh_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._recent_refreshes: Dict[str, Tuple[str, float]] = {}
+        self._refresh_guard = threading.Lock()
+    
+    @property
+    def redmine_client(self) -> RedmineClient:
+        """Shared Redmine client (follows Redmine URL changes from admin settings)"""
+        return get_redmine_client()
     
     def authenticate_user(self, username: str, password: str) -> Tuple[bool, Optional[str], Optional[User]]:
         """
@@ -38,12 +75,22 @@ class AuthService:
         Returns:
             Tuple of (success, error_message, user_object)
         """
+        success, error, user, _ = self._authenticate(username, password)
+        return success, error, user
+    
+    def _authenticate(self, username: str, password: str) -> Tuple[bool, Optional[str], Optional[User], Optional[str]]:
+        """
+        Authenticate user and also return the user's personal Redmine API key
+        
+        Returns:
+            Tuple of (success, error_message, user_object, redmine_api_key)
+        """
         try:
             # Authenticate with Redmine
             redmine_user_data = self.redmine_client.authenticate_user(username, password)
             
             if not redmine_user_data:
-                return False, "Invalid Redmine credentials", None
+                return False, "Invalid Redmine credentials", None, None
             
             # Extract user information from Redmine response
             user_info = redmine_user_data.get("user", {})
@@ -52,22 +99,17 @@ class AuthService:
             custom_fields = user_info.get("custom_fields", [])
             
             if not redmine_user_id:
-                return False, "Unable to retrieve user information from Redmine", None
+                return False, "Unable to retrieve user information from Redmine", None, None
             
-            # Convert custom fields to dict for storage
-            custom_fields_dict = {}
-            if custom_fields:
-                for field in custom_fields:
-                    custom_fields_dict[field.get("name", "")] = field.get("value", "")
+            # Update last login and fetch existing user in a single round trip
+            user = self.user_manager.touch_and_fetch_by_redmine_id(redmine_user_id)
             
-            # Check if user exists in local database
-            existing_user = self.user_manager.get_user_by_redmine_id(redmine_user_id)
-            
-            if existing_user:
-                # Update last login for existing user
-                self.user_manager.update_last_login(existing_user.id)
-                user = existing_user
-            else:
+            if not user:
+                # Convert custom fields to dict for storage (new users only)
+                custom_fields_dict = {
+                    field.get("name", ""): field.get("value", "") for field in custom_fields
+                } if custom_fields else None
+                
                 # Create new user in local database
                 user = self.user_manager.create_user(
                     redmine_user_id=redmine_user_id,
@@ -75,10 +117,10 @@ class AuthService:
                     custom_fields=custom_fields_dict
                 )
             
-            return True, None, user
+            return True, None, user, user_info.get("api_key")
             
         except Exception as e:
-            return False, f"Authentication error: {str(e)}", None
+            return False, f"Authentication error: {str(e)}", None, None
     
     def create_session(self, user: User) -> str:
         """
@@ -93,15 +135,17 @@ class AuthService:
         return self.jwt_manager.create_token(
             user_id=user.id,
             username=user.username,
-            role=user.role
+            role=user.role,
+            redmine_user_id=user.redmine_user_id,
+            created_at=user.created_at
         )
     
-    def get_current_user(self) -> Optional[User]:
+    def _get_session_payload(self) -> Optional[Dict[str, Any]]:
         """
-        Get current authenticated user from session
+        Get verified JWT payload for the current session, refreshing the token if needed
         
         Returns:
-            User object if authenticated, None if not authenticated
+            Payload dict if authenticated, None if not authenticated
         """
         token = st.session_state.get("jwt_token")
         if not token:
@@ -109,23 +153,127 @@ class AuthService:
         
         # Check if token needs refresh
         if self.jwt_manager.should_refresh_token(token):
-            new_token = self.jwt_manager.refresh_token(token)
+            new_token = self.refresh_session(token)
             if new_token:
                 st.session_state.jwt_token = new_token
                 token = new_token
         
-        # Verify token and get user
+        # Verify token
         payload = self.jwt_manager.verify_token(token)
         if not payload:
             # Token is invalid, clear session
             self.logout()
             return None
         
+        return payload
+    
+    def refresh_session(self, token: str) -> Optional[str]:
+        """
+        Issue a new token for the session, picking up role changes from the database
+        
+        Args:
+            token: Current JWT token string
+            
+        Returns:
+            New JWT token string if refresh successful, None if failed
+        """
+        recent = self._get_recent_refresh(token)
+        if recent:
+            return recent
+        
+        with self._refresh_guard:
+            lock = self._refresh_locks[token]
+        
+        with lock:
+            # Another rerun may have refreshed this token while we waited
+            recent = self._get_recent_refresh(token)
+            if recent:
+                return recent
+            
+            payload = self.jwt_manager.verify_token(token)
+            user = None
+            if payload and payload.get("user_id"):
+                user = self.user_manager.get_user_by_id(payload["user_id"])
+            
+            if not user:
+                with self._refresh_guard:
+                    self._refresh_locks.pop(token, None)
+                return None
+            
+            new_token = self.create_session(user)
+            with self._refresh_guard:
+                self._recent_refreshes[token] = (new_token, time.monotonic())
+            return new_token
+    
+    def _get_recent_refresh(self, token: str) -> Optional[str]:
+        """Return a token recently issued for this token, evicting stale entries"""
+        now = time.monotonic()
+        with self._refresh_guard:
+            for old_token, (_, issued_at) in list(self._recent_refreshes.items()):
+                if now - issued_at > REFRESH_EVICT_SECONDS:
+                    del self._recent_refreshes[old_token]
+                    self._refresh_locks.pop(old_token, None)
+            
+            entry = self._recent_refreshes.get(token)
+            if entry and now - entry[1] < REFRESH_REUSE_SECONDS:
+                return entry[0]
+            return None
+    
+    def get_current_user(self) -> Optional[User]:
+        """
+        Get current authenticated user from session
+        
+        The user is loaded from the database at most every
+        CURRENT_USER_TTL_SECONDS and served from session state in between, so
+        role changes and deletions take effect within that window. Use
+        get_current_user_fresh() when conversion_count or last_login must be
+        current.
+        
+        Returns:
+            User object if authenticated, None if not authenticated
+        """
+        # Fast path: user resolved for this token recently, no token checks needed
+        token = st.session_state.get("jwt_token")
+        if (token and st.session_state.get("_current_user_cache_token") == token
+                and time.time() < st.session_state.get("_current_user_cache_until", 0)):
+            return st.session_state.get("_current_user_cache")
+        
+        payload = self._get_session_payload()
+        if not payload:
+            return None
+        
         user_id = payload.get("user_id")
-        if user_id:
-            return self.user_manager.get_user_by_id(user_id)
+        if not user_id:
+            return None
+        
+        # End the session of a user that has been deleted since the token was issued
+        user = self.user_manager.get_user_by_id(user_id)
+        if user is None:
+            self.logout()
+            return None
+        
+        # Token may have been refreshed; revalidate no later than the next refresh point
+        token = st.session_state.get("jwt_token")
+        st.session_state._current_user_cache_until = min(
+            time.time() + CURRENT_USER_TTL_SECONDS,
+            payload["exp"] - self.jwt_manager.refresh_threshold_seconds
+        )
+        st.session_state._current_user_cache = user
+        st.session_state._current_user_cache_token = token
+        return user
+    
+    def get_current_user_fresh(self) -> Optional[User]:
+        """
+        Get current authenticated user with all fields loaded from the database
+        
+        Returns:
+            User object if authenticated and present in database, None otherwise
+        """
+        payload = self._get_session_payload()
+        if not payload or not payload.get("user_id"):
+            return None
         
-        return None
+        return self.user_manager.get_user_by_id(payload["user_id"])
     
     def is_authenticated(self) -> bool:
         """
@@ -146,39 +294,41 @@ class AuthService:
         user = self.get_current_user()
         return user is not None and user.role == "admin"
     
-    def store_user_credentials(self, username: str, password: str):
+    def connect_redmine_account(self, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """
-        Store user credentials temporarily in session for API calls
-        Note: Only stores in memory for current session
+        Exchange Redmine credentials for the user's API key and keep it in the session
+        The password itself is never stored
         
         Args:
             username: Redmine username
             password: Redmine password
+            
+        Returns:
+            Tuple of (success, error_message)
         """
-        # Store credentials in session state (temporary)
-        st.session_state.redmine_username = username
-        st.session_state.redmine_password = password
+        redmine_user_data = self.redmine_client.authenticate_user(username, password)
+        if not redmine_user_data:
+            return False, "Invalid Redmine credentials"
+        
+        api_key = redmine_user_data.get("user", {}).get("api_key")
+        if not api_key:
+            return False, "Redmine did not return an API key for this account"
+        
+        st.session_state.redmine_api_key = api_key
+        return True, None
     
-    def get_user_credentials(self) -> Optional[Tuple[str, str]]:
+    def get_user_api_key(self) -> Optional[str]:
         """
-        Get stored user credentials from session
+        Get the user's personal Redmine API key from session
         
         Returns:
-            Tuple of (username, password) if available, None otherwise
+            API key if available, None otherwise
         """
-        username = st.session_state.get("redmine_username")
-        password = st.session_state.get("redmine_password")
-        
-        if username and password:
-            return username, password
-        return None
+        return st.session_state.get("redmine_api_key")
     
-    def clear_user_credentials(self):
-        """Clear stored user credentials from session"""
-        if "redmine_username" in st.session_state:
-            del st.session_state.redmine_username
-        if "redmine_password" in st.session_state:
-            del st.session_state.redmine_password
+    def clear_user_api_key(self):
+        """Clear the user's personal Redmine API key from session"""
+        _purge_session(API_KEY_SESSION_KEYS)
     
     def login(self, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """
@@ -191,7 +341,7 @@ class AuthService:
         Returns:
             Tuple of (success, error_message)
         """
-        success, error, user = self.authenticate_user(username, password)
+        success, error, user, api_key = self._authenticate(username, password)
         
         if success and user:
             # Create JWT session
@@ -203,8 +353,9 @@ class AuthService:
             st.session_state.username = user.username
             st.session_state.user_role = user.role
             
-            # Store credentials for API calls (session only)
-            self.store_user_credentials(username, password)
+            # Store personal API key for Redmine calls (session only, no password)
+            if api_key:
+                st.session_state.redmine_api_key = api_key
             
             return True, None
         
@@ -212,15 +363,12 @@ class AuthService:
     
     def logout(self):
         """Clear user session and logout"""
+        token = st.session_state.get("jwt_token")
+        if token:
+            self.jwt_manager.invalidate_token(token)
+        
         # Clear all session state related to authentication
-        session_keys_to_clear = [
-            "jwt_token", "user_id", "username", "user_role",
-            "redmine_username", "redmine_password"  # Clear credentials too
-        ]
-        
-        for key in session_keys_to_clear:
-            if key in st.session_state:
-                del st.session_state[key]
+        _purge_session(AUTH_SESSION_KEYS)
     
     def require_authentication(self):
         """
@@ -236,29 +384,29 @@ class AuthService:
         Admin authorization decorator/middleware for pages
         Redirects if not admin user
         """
-        self.require_authentication()
+        # Resolve user once; check role against the database so revoked admin rights apply immediately
+        user = self.get_current_user_fresh()
+        if user is None:
+            st.error("🔒 Please log in to access this page")
+            st.stop()
         
-        if not self.is_admin():
+        if user.role != "admin":
             st.error("🚫 Admin access required")
             st.stop()
     
-    def get_user_credentials_from_session(self) -> Optional[Tuple[str, str]]:
-        """
-        Get stored user credentials from session for API calls
-        Note: In production, consider more secure credential storage
-        
-        Returns:
-            Tuple of (username, password) if available, None otherwise
-        """
-        # For now, we don't store passwords in session for security
-        # This would need to be implemented differently in production
-        return None
-    
-    def test_redmine_connection(self) -> bool:
+    def test_redmine_connection(self, use_cache: bool = True) -> bool:
         """
         Test connection to Redmine API
         
+        Args:
+            use_cache: Reuse a recent connection test result if available
+            
         Returns:
             True if connection successful, False if failed
         """
-        return self.redmine_client.test_connection() 
\ No newline at end of file
+        return self.redmine_client.test_connection(use_cache=use_cache)
+
+@st.cache_resource
+def get_auth_service() -> AuthService:
+    """Get the shared AuthService instance"""
+    return AuthService()
@@ -4,24 +4,82 @@ Handles JWT creation, validation, and refresh functionality
 """
 
 import jwt
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, UTC
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import os
-from dotenv import load_dotenv
+from . import _env  # Loads .env once per process
 
-load_dotenv()
+# Secret key is not editable at runtime, so read it once at import
+_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default-secret-key-change-in-production")
+
+# Cache of token verification results shared by all JWTManager instances.
+# Keys are (token digest, secret key) so a rotated secret never serves stale entries.
+# Valid tokens are cached until their exp claim; invalid tokens (payload None)
+# are cached briefly so a lingering bad token doesn't re-run HMAC on every rerun.
+_VERIFY_CACHE_MAX_SIZE = 2048
+_NEGATIVE_CACHE_TTL_SECONDS = 60
+_verify_cache: "OrderedDict[Tuple[bytes, bytes], Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+_verify_cache_lock = threading.Lock()
+
+def _token_digest(token: str) -> bytes:
+    """Hash token to a short fixed-size cache key"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _get_cached_result(key: Tuple[bytes, bytes]) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Look up a cached verification result, evicting expired entries
+    
+    Returns:
+        Tuple of (hit, payload); payload is None for cached failures
+    """
+    with _verify_cache_lock:
+        entry = _verify_cache.get(key)
+        if entry is None:
+            return False, None
+        payload, valid_until = entry
+        if valid_until <= time.time():
+            del _verify_cache[key]
+            return False, None
+        _verify_cache.move_to_end(key)
+        return True, payload
+
+def _store_cached_result(key: Tuple[bytes, bytes], payload: Optional[Dict[str, Any]]):
+    """Store verified payload until its expiration time, or a failure for a short window"""
+    if payload is None:
+        valid_until = time.time() + _NEGATIVE_CACHE_TTL_SECONDS
+    else:
+        exp_ts = payload.get("exp")
+        if not exp_ts:
+            return
+        valid_until = float(exp_ts)
+    
+    with _verify_cache_lock:
+        _verify_cache[key] = (payload, valid_until)
+        _verify_cache.move_to_end(key)
+        while len(_verify_cache) > _VERIFY_CACHE_MAX_SIZE:
+            _verify_cache.popitem(last=False)
 
 class JWTManager:
     """Manages JWT token operations for user authentication"""
     
     def __init__(self):
         """Initialize JWT manager with configuration from environment"""
-        self.secret_key = os.getenv("JWT_SECRET_KEY", "default-secret-key-change-in-production")
+        self.secret_key = _SECRET_KEY.encode("utf-8")  # HS256 accepts bytes; avoids per-call encoding
         self.algorithm = "HS256"
+        self._algorithms = [self.algorithm]
+        self._jwt = jwt.PyJWT()  # Reused encoder/decoder instead of module-level helpers
         self.token_expiry_hours = 12  # As per requirements
         self.refresh_threshold_hours = 1  # Refresh token if less than 1 hour remaining
+        self.refresh_threshold_seconds = self.refresh_threshold_hours * 3600
+        self._exp_delta = timedelta(hours=self.token_expiry_hours)
         
-    def create_token(self, user_id: int, username: str, role: str) -> str:
+    def create_token(self, user_id: int, username: str, role: str,
+                     redmine_user_id: Optional[int] = None,
+                     created_at: Optional[int] = None) -> str:
         """
         Create a new JWT token for authenticated user
         
@@ -29,6 +87,8 @@ class JWTManager:
             user_id: Internal user ID
             username: Redmine username
             role: User role (admin/user)
+            redmine_user_id: Redmine user ID (optional)
+            created_at: User creation time in Unix seconds (optional)
             
         Returns:
             JWT token string
@@ -38,11 +98,13 @@ class JWTManager:
             "user_id": user_id,
             "username": username,
             "role": role,
+            "redmine_user_id": redmine_user_id,
+            "created_at": created_at,
             "iat": now,  # Issued at
-            "exp": now + timedelta(hours=self.token_expiry_hours)  # Expiration
+            "exp": now + self._exp_delta  # Expiration
         }
         
-        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+        return self._jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """
@@ -54,13 +116,30 @@ class JWTManager:
         Returns:
             Decoded payload dict if valid, None if invalid
         """
+        cache_key = (_token_digest(token), self.secret_key)
+        hit, cached_payload = _get_cached_result(cache_key)
+        if hit:
+            return cached_payload
+        
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
+            payload = self._jwt.decode(token, self.secret_key, algorithms=self._algorithms)
         except jwt.ExpiredSignatureError:
-            return None
+            payload = None
         except jwt.InvalidTokenError:
-            return None
+            payload = None
+        
+        _store_cached_result(cache_key, payload)
+        return payload
+    
+    def invalidate_token(self, token: str):
+        """
+        Remove token from the verification cache (e.g. on logout)
+        
+        Args:
+            token: JWT token string
+        """
+        with _verify_cache_lock:
+            _verify_cache.pop((_token_digest(token), self.secret_key), None)
     
     def is_token_expired(self, token: str) -> bool:
         """
@@ -92,11 +171,8 @@ class JWTManager:
         exp_timestamp = payload.get("exp")
         if not exp_timestamp:
             return False
-            
-        expiry_time = datetime.fromtimestamp(exp_timestamp, UTC)
-        refresh_time = expiry_time - timedelta(hours=self.refresh_threshold_hours)
         
-        return datetime.now(UTC) >= refresh_time
+        return exp_timestamp - int(time.time()) <= self.refresh_threshold_seconds
     
     def refresh_token(self, token: str) -> Optional[str]:
         """
@@ -116,7 +192,9 @@ class JWTManager:
         return self.create_token(
             user_id=payload["user_id"],
             username=payload["username"],
-            role=payload["role"]
+            role=payload["role"],
+            redmine_user_id=payload.get("redmine_user_id"),
+            created_at=payload.get("created_at")
         )
     
     def decode_token_payload(self, token: str) -> Optional[Dict[str, Any]]:
@@ -130,6 +208,6 @@ class JWTManager:
             Payload dict if decodable, None if malformed
         """
         try:
-            return jwt.decode(token, options={"verify_signature": False})
+            return self._jwt.decode(token, options={"verify_signature": False})
         except jwt.InvalidTokenError:
             return None 
\ No newline at end of file
@@ -3,23 +3,258 @@ Redmine API client for authentication and user data retrieval
 """
 
 import requests
-from typing import Optional, Dict, Any, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+import logging
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from . import _env  # Loads .env once per process
+from ..utils.json_utils import json_loads
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+# API key is not editable at runtime, so read it once at import
+_REDMINE_API_KEY = os.getenv("REDMINE_API_KEY", "")
+
+# Seconds a connection test result is reused before probing Redmine again
+CONNECTION_CHECK_TTL_SECONDS = 60
+
+# Upload retry policy for transient gateway errors and connection failures
+UPLOAD_MAX_ATTEMPTS = 3
+UPLOAD_BACKOFF_SECONDS = 0.5
+UPLOAD_RETRY_STATUSES = {502, 503, 504}
+
+# Last connection test result per (base_url, api_key): (monotonic timestamp, result)
+_connection_check_cache: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+
+# User lookups (by id / login) are reused for this many seconds
+USER_CACHE_TTL_SECONDS = 600
+USER_CACHE_MAX_SIZE = 1024
+
+# Maximum number of URLs kept for conditional GET revalidation
+CONDITIONAL_CACHE_MAX_SIZE = 256
+
+# Connection pool bounds; callers beyond POOL_MAXSIZE wait for a free
+# connection instead of opening extra ones against Redmine
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+# Connect/read timeout for the connectivity probe, which is never retried
+PROBE_TIMEOUT_SECONDS = (3, 5)
+
+@dataclass(frozen=True)
+class RedmineConfig:
+    """Redmine connection settings read from the environment in one pass"""
+    base_url: str
+    api_key: str
+    default_project_id: str
+    
+    @classmethod
+    def from_env(cls) -> "RedmineConfig":
+        """Build config from current environment (URL and project ID are hot-reloadable)"""
+        return cls(
+            base_url=os.getenv("REDMINE_URL", "").rstrip('/'),
+            api_key=_REDMINE_API_KEY,
+            default_project_id=os.getenv("DEFAULT_PROJECT_ID", "1")
+        )
+
+# Process-wide client so every caller shares one connection pool
+_shared_client: Optional["RedmineClient"] = None
+_shared_client_lock = threading.Lock()
+
+def get_redmine_client() -> "RedmineClient":
+    """
+    Get the shared RedmineClient, rebuilding it if the Redmine URL or
+    default project was changed from admin settings
+    
+    Returns:
+        Shared RedmineClient instance
+    """
+    global _shared_client
+    config = RedmineConfig.from_env()
+    
+    with _shared_client_lock:
+        client = _shared_client
+        if client is None or client.config != config:
+            if client is not None:
+                # Release the old client's pooled connections
+                client.close()
+            client = RedmineClient(config)
+            _shared_client = client
+        return client
 
 class RedmineClient:
     """Handles communication with Redmine API for authentication and data retrieval"""
     
-    def __init__(self):
-        """Initialize Redmine client with configuration from environment"""
-        self.base_url = os.getenv("REDMINE_URL", "").rstrip('/')
-        self.api_key = os.getenv("REDMINE_API_KEY", "")
-        self.default_project_id = os.getenv("DEFAULT_PROJECT_ID", "1")
+    def __init__(self, config: Optional[RedmineConfig] = None):
+        """
+        Initialize Redmine client
+        
+        Args:
+            config: Connection settings (read from environment if None)
+        """
+        self.config = config or RedmineConfig.from_env()
+        self.base_url = self.config.base_url
+        self.api_key = self.config.api_key
+        self.default_project_id = self.config.default_project_id
         
         if not self.base_url:
             raise ValueError("REDMINE_URL environment variable is required")
+        
+        # Endpoint URLs are fixed for the client's lifetime
+        self.url_current = f"{self.base_url}/users/current.json"
+        self.url_users = f"{self.base_url}/users.json"
+        self.url_projects = f"{self.base_url}/projects.json"
+        self.url_issues = f"{self.base_url}/issues.json"
+        self.url_uploads = f"{self.base_url}/uploads.json"
+        self.url_user = (self.base_url + "/users/{}.json").format
+        self.url_issue = (self.base_url + "/issues/{}.json").format
+        
+        # Persistent session reuses keep-alive connections across API calls
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            pool_block=True,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1.0,
+                backoff_max=30,
+                backoff_jitter=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # POST is not idempotent in Redmine (no Idempotency-Key support),
+                # so only connection failures before the request is sent are retried
+                allowed_methods={"GET", "PUT"},
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Session without transport retries for calls that must fail fast
+        # (connection probe) or retry on their own (file uploads)
+        self.single_shot_session = requests.Session()
+        single_shot_adapter = HTTPAdapter(max_retries=0)
+        self.single_shot_session.mount("http://", single_shot_adapter)
+        self.single_shot_session.mount("https://", single_shot_adapter)
+        
+        # API key header is only sent on admin calls, never alongside basic auth
+        self._api_key_headers = {"X-Redmine-API-Key": self.api_key}
+        
+        # TTL cache of successful user lookups: key -> (monotonic timestamp, user data)
+        self._user_cache: Dict[Tuple[str, Any], Tuple[float, Dict[str, Any]]] = {}
+        self._user_cache_lock = threading.Lock()
+        
+        # Validators and bodies for conditional GETs: key -> (etag, last_modified, data)
+        self._conditional_cache: Dict[Tuple[Any, ...], Tuple[Optional[str], Optional[str], Any]] = {}
+        self._conditional_cache_lock = threading.Lock()
+    
+    def _conditional_get(self, url: str, headers: Optional[Dict[str, str]] = None,
+                         params: Optional[Dict[str, Any]] = None,
+                         timeout: int = 10) -> Tuple[requests.Response, Optional[Any]]:
+        """
+        GET a JSON resource, revalidating a previously seen body with ETag / Last-Modified
+        
+        Args:
+            url: Request URL
+            headers: Extra request headers (authentication)
+            params: Query parameters
+            timeout: Request timeout in seconds
+            
+        Returns:
+            Tuple of (response, parsed body); body is None unless status is 200 or 304
+        """
+        cache_key = (
+            url,
+            tuple(sorted(params.items())) if params else (),
+            tuple(sorted(headers.items())) if headers else ()
+        )
+        with self._conditional_cache_lock:
+            cached = self._conditional_cache.get(cache_key)
+        
+        request_headers = dict(headers) if headers else {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+        
+        response = self.session.get(url, headers=request_headers, params=params, timeout=timeout)
+        
+        if response.status_code == 304 and cached:
+            return response, cached[2]
+        
+        if response.status_code != 200:
+            return response, None
+        
+        data = self._parse_json(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self._conditional_cache_lock:
+                if cache_key not in self._conditional_cache and len(self._conditional_cache) >= CONDITIONAL_CACHE_MAX_SIZE:
+                    del self._conditional_cache[next(iter(self._conditional_cache))]
+                self._conditional_cache[cache_key] = (etag, last_modified, data)
+        return response, data
+    
+    def _get_cached_user(self, key: Tuple[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return cached user data if still fresh"""
+        with self._user_cache_lock:
+            entry = self._user_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= USER_CACHE_TTL_SECONDS:
+                del self._user_cache[key]
+                return None
+            return entry[1]
+    
+    def _store_cached_user(self, key: Tuple[str, Any], user_data: Dict[str, Any]):
+        """Cache user data, dropping the oldest entry when full"""
+        with self._user_cache_lock:
+            if key not in self._user_cache and len(self._user_cache) >= USER_CACHE_MAX_SIZE:
+                del self._user_cache[next(iter(self._user_cache))]
+            self._user_cache[key] = (time.monotonic(), user_data)
+    
+    def _check_auth_failure(self, response: requests.Response):
+        """Drop cached user lookups when the API key is rejected"""
+        if response.status_code in (401, 403):
+            with self._user_cache_lock:
+                self._user_cache.clear()
+    
+    def close(self):
+        """Close the underlying HTTP sessions and their pooled connections"""
+        self.session.close()
+        self.single_shot_session.close()
+    
+    def auth_headers(self, user_api_key: str) -> Dict[str, str]:
+        """
+        Build authentication headers for calls made with a user's own API key
+        
+        Args:
+            user_api_key: Personal Redmine API key
+            
+        Returns:
+            Headers dict for the request
+        """
+        return {"X-Redmine-API-Key": user_api_key}
+    
+    def _parse_json(self, response: requests.Response) -> Any:
+        """
+        Decode a JSON response body with the fast JSON parser
+        
+        Raises:
+            requests.exceptions.InvalidJSONError: If the body is not valid JSON
+        """
+        try:
+            return json_loads(response.content)
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(str(e), response=response)
     
     def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """
@@ -34,22 +269,21 @@ class RedmineClient:
         """
         try:
             # Use Redmine API endpoint to get current user info
-            api_url = f"{self.base_url}/users/current.json"
+            api_url = self.url_current
             
-            response = requests.get(
+            response = self.session.get(
                 api_url,
                 auth=(username, password),
-                headers={"Content-Type": "application/json"},
                 timeout=10
             )
             
             if response.status_code == 200:
-                return response.json()
+                return self._parse_json(response)
             else:
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine authentication error: {e}")
+            logger.error("Redmine authentication error: %s", e)
             return None
     
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
@@ -62,63 +296,60 @@ class RedmineClient:
         Returns:
             User data dict if found, None if not found or error
         """
+        cache_key = ("id", user_id)
+        cached = self._get_cached_user(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            api_url = f"{self.base_url}/users/{user_id}.json"
+            api_url = self.url_user(user_id)
             
             # Use API key for administrative access
-            headers = {"X-Redmine-API-Key": self.api_key}
+            response, user_data = self._conditional_get(api_url, headers=self._api_key_headers)
             
-            response = requests.get(api_url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
+            if user_data is not None:
+                self._store_cached_user(cache_key, user_data)
+                return user_data
             else:
+                self._check_auth_failure(response)
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine user lookup error: {e}")
+            logger.error("Redmine user lookup error: %s", e)
             return None
     
-    def get_user_projects(self, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
+    def get_user_projects(self, user_api_key: str) -> Optional[List[Dict[str, Any]]]:
         """
         Get projects accessible to user
         
         Args:
-            username: Redmine username
-            password: Redmine password
+            user_api_key: User's personal Redmine API key
             
         Returns:
             List of project dicts if successful, None if failed
         """
         try:
-            api_url = f"{self.base_url}/projects.json"
+            api_url = self.url_projects
             
-            response = requests.get(
-                api_url,
-                auth=(username, password),
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
+            response, data = self._conditional_get(api_url, headers=self.auth_headers(user_api_key))
             
-            if response.status_code == 200:
-                data = response.json()
+            if data is not None:
                 return data.get("projects", [])
             else:
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine projects error: {e}")
+            logger.error("Redmine projects error: %s", e)
             return None
     
-    def get_user_issues(self, username: str, password: str, 
+    def get_user_issues(self, user_api_key: str,
                        project_id: Optional[str] = None,
                        limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """
         Get issues assigned to or created by user
         
         Args:
-            username: Redmine username
-            password: Redmine password
+            user_api_key: User's personal Redmine API key
             project_id: Optional project ID filter
             limit: Maximum number of issues to return
             
@@ -126,7 +357,7 @@ class RedmineClient:
             List of issue dicts if successful, None if failed
         """
         try:
-            api_url = f"{self.base_url}/issues.json"
+            api_url = self.url_issues
             
             params = {
                 "assigned_to_id": "me",
@@ -137,33 +368,31 @@ class RedmineClient:
             if project_id:
                 params["project_id"] = project_id
             
-            response = requests.get(
+            response = self.session.get(
                 api_url,
-                auth=(username, password),
-                headers={"Content-Type": "application/json"},
+                headers=self.auth_headers(user_api_key),
                 params=params,
                 timeout=10
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = self._parse_json(response)
                 return data.get("issues", [])
             else:
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine issues error: {e}")
+            logger.error("Redmine issues error: %s", e)
             return None
     
-    def create_issue(self, username: str, password: str, 
+    def create_issue(self, user_api_key: str,
                     subject: str, description: str,
                     project_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Create a new issue in Redmine
         
         Args:
-            username: Redmine username
-            password: Redmine password
+            user_api_key: User's personal Redmine API key
             subject: Issue subject/title
             description: Issue description
             project_id: Project ID (uses default if not provided)
@@ -172,7 +401,7 @@ class RedmineClient:
             Created issue dict if successful, None if failed
         """
         try:
-            api_url = f"{self.base_url}/issues.json"
+            api_url = self.url_issues
             
             issue_data = {
                 "issue": {
@@ -182,32 +411,30 @@ class RedmineClient:
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 api_url,
-                auth=(username, password),
-                headers={"Content-Type": "application/json"},
+                headers=self.auth_headers(user_api_key),
                 json=issue_data,
                 timeout=10
             )
             
             if response.status_code == 201:
-                return response.json()
+                return self._parse_json(response)
             else:
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine issue creation error: {e}")
+            logger.error("Redmine issue creation error: %s", e)
             return None
     
-    def upload_file_to_issue(self, username: str, password: str,
+    def upload_file_to_issue(self, user_api_key: str,
                            issue_id: int, file_path: str, 
                            filename: str) -> bool:
         """
         Upload file attachment to Redmine issue
         
         Args:
-            username: Redmine username
-            password: Redmine password
+            user_api_key: User's personal Redmine API key
             issue_id: Redmine issue ID
             file_path: Local file path
             filename: Display filename
@@ -217,28 +444,21 @@ class RedmineClient:
         """
         try:
             # First upload the file
-            upload_url = f"{self.base_url}/uploads.json"
+            upload_url = self.url_uploads
             
-            with open(file_path, 'rb') as f:
-                response = requests.post(
-                    upload_url,
-                    auth=(username, password),
-                    headers={"Content-Type": "application/octet-stream"},
-                    data=f,
-                    timeout=30
-                )
+            response = self._post_file(upload_url, user_api_key, file_path)
             
             if response.status_code != 201:
                 return False
                 
-            upload_data = response.json()
+            upload_data = self._parse_json(response)
             token = upload_data.get("upload", {}).get("token")
             
             if not token:
                 return False
             
             # Then attach the uploaded file to the issue
-            issue_url = f"{self.base_url}/issues/{issue_id}.json"
+            issue_url = self.url_issue(issue_id)
             
             update_data = {
                 "issue": {
@@ -249,10 +469,9 @@ class RedmineClient:
                 }
             }
             
-            response = requests.put(
+            response = self.session.put(
                 issue_url,
-                auth=(username, password),
-                headers={"Content-Type": "application/json"},
+                headers=self.auth_headers(user_api_key),
                 json=update_data,
                 timeout=10
             )
@@ -260,21 +479,78 @@ class RedmineClient:
             return response.status_code == 204
             
         except (requests.exceptions.RequestException, FileNotFoundError, IOError) as e:
-            print(f"Redmine file upload error: {e}")
+            logger.error("Redmine file upload error: %s", e)
             return False
     
-    def test_connection(self) -> bool:
+    def _post_file(self, url: str, user_api_key: str, file_path: str) -> requests.Response:
+        """
+        Stream a file to Redmine, retrying transient failures from the start of the file
+        
+        The open file object is passed as the body so requests streams it from
+        disk with a Content-Length header instead of reading it into memory.
+        Uses the single-shot session so this loop is the only retry layer.
+        
+        Args:
+            url: Upload endpoint URL
+            user_api_key: User's personal Redmine API key
+            file_path: Local file path
+            
+        Returns:
+            Response of the last attempt
+        """
+        headers = {
+            **self.auth_headers(user_api_key),
+            "Content-Type": "application/octet-stream"
+        }
+        
+        with open(file_path, 'rb') as f:
+            for attempt in range(UPLOAD_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(UPLOAD_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+                    f.seek(0)
+                
+                try:
+                    response = self.single_shot_session.post(url, headers=headers, data=f, timeout=30)
+                except requests.exceptions.ConnectionError:
+                    if attempt == UPLOAD_MAX_ATTEMPTS - 1:
+                        raise
+                    continue
+                
+                if response.status_code not in UPLOAD_RETRY_STATUSES:
+                    break
+        
+        return response
+    
+    def test_connection(self, use_cache: bool = True) -> bool:
         """
         Test connection to Redmine API
         
+        Results are reused for CONNECTION_CHECK_TTL_SECONDS so page reruns
+        don't probe Redmine every time.
+        
+        Args:
+            use_cache: Reuse a recent result instead of probing again
+            
         Returns:
             True if connection successful, False if failed
         """
+        cache_key = (self.base_url, self.api_key)
+        if use_cache:
+            cached = _connection_check_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < CONNECTION_CHECK_TTL_SECONDS:
+                return cached[1]
+        
+        result = self._probe_connection()
+        _connection_check_cache[cache_key] = (time.monotonic(), result)
+        return result
+    
+    def _probe_connection(self) -> bool:
+        """Perform a single live request against the Redmine API, without retries or backoff"""
         try:
-            api_url = f"{self.base_url}/projects.json"
-            headers = {"X-Redmine-API-Key": self.api_key} if self.api_key else {}
-            
-            response = requests.get(api_url, headers=headers, timeout=5)
+            headers = self._api_key_headers if self.api_key else None
+            response = self.single_shot_session.get(
+                self.url_projects, headers=headers, timeout=PROBE_TIMEOUT_SECONDS
+            )
             return response.status_code == 200
             
         except requests.exceptions.RequestException:
@@ -303,7 +579,7 @@ class RedmineClient:
             List of issue dicts if successful, None if failed
         """
         try:
-            api_url = f"{self.base_url}/issues.json"
+            api_url = self.url_issues
             
             # Build query parameters
             params = {
@@ -339,25 +615,23 @@ class RedmineClient:
                 params["search"] = search_query
             
             # Use API key authentication
-            headers = {"X-Redmine-API-Key": self.api_key}
-            
-            response = requests.get(
+            response = self.session.get(
                 api_url,
-                headers=headers,
+                headers=self._api_key_headers,
                 params=params,
                 timeout=15
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = self._parse_json(response)
                 return data.get("issues", [])
             else:
-                print(f"API request failed: {response.status_code}")
-                print(f"Response: {response.text}")
+                logger.warning("API request failed: %s", response.status_code)
+                logger.debug("Response: %s", response.text)
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine issues error: {e}")
+            logger.error("Redmine issues error: %s", e)
             return None
     
     def create_issue_with_api_key(self, subject: str, description: str,
@@ -376,7 +650,7 @@ class RedmineClient:
             Created issue dict if successful, None if failed
         """
         try:
-            api_url = f"{self.base_url}/issues.json"
+            api_url = self.url_issues
             
             # Prepare issue data
             issue_data = {
@@ -395,27 +669,22 @@ class RedmineClient:
                 issue_data["issue"]["assigned_to_id"] = assigned_to_user_id
             
             # Use API key authentication
-            headers = {
-                "X-Redmine-API-Key": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
+            response = self.session.post(
                 api_url,
-                headers=headers,
+                headers=self._api_key_headers,
                 json=issue_data,
                 timeout=15
             )
             
             if response.status_code == 201:
-                return response.json()
+                return self._parse_json(response)
             else:
-                print(f"Failed to create issue: {response.status_code}")
-                print(f"Response: {response.text}")
+                logger.warning("Failed to create issue: %s", response.status_code)
+                logger.debug("Response: %s", response.text)
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine issue creation error: {e}")
+            logger.error("Redmine issue creation error: %s", e)
             return None
     
     def get_user_by_login(self, login: str) -> Optional[Dict[str, Any]]:
@@ -428,28 +697,34 @@ class RedmineClient:
         Returns:
             User data dict if found, None if not found or error
         """
+        cache_key = ("login", login)
+        cached = self._get_cached_user(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # Search for user by login
-            api_url = f"{self.base_url}/users.json"
+            api_url = self.url_users
             
-            headers = {"X-Redmine-API-Key": self.api_key}
             params = {"name": login}
             
-            response = requests.get(api_url, headers=headers, params=params, timeout=10)
+            response = self.session.get(api_url, headers=self._api_key_headers, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = self._parse_json(response)
                 users = data.get("users", [])
                 
                 # Find exact match by login
                 for user in users:
                     if user.get("login") == login:
+                        self._store_cached_user(cache_key, user)
                         return user
                 
                 return None
             else:
+                self._check_auth_failure(response)
                 return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Redmine user lookup error: {e}")
+            logger.error("Redmine user lookup error: %s", e)
             return None 
\ No newline at end of file
@@ -4,15 +4,99 @@ Ticket model and Redmine API integration for CV Converter Web Application
 
 import requests
 from typing import Optional, Dict, Any, List, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass
+from functools import lru_cache
+import logging
 import os
-from dotenv import load_dotenv
-from ..auth.redmine_client import RedmineClient
+import streamlit as st
+from ..auth import _env  # Loads .env once per process
+from ..auth.redmine_client import RedmineClient, get_redmine_client
+from ..utils.json_utils import json_loads
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Shared read-only stand-in for missing nested references (status, tracker, ...)
+_EMPTY_REF: Dict[str, Any] = {}
+
+# Author filter for the current user
+_AUTHOR_ME_PARAMS: Tuple[Tuple[str, Any], ...] = (
+    ("f[]", "author_id"),
+    ("op[author_id]", "="),
+    ("v[author_id][]", "me"),
+)
+
+# Tracker filter for positions (5) and candidates (9)
+_TRACKER_FILTER_PARAMS: Tuple[Tuple[str, Any], ...] = (
+    ("f[]", "tracker_id"),
+    ("op[tracker_id]", "="),
+    ("v[tracker_id][]", 5),
+    ("v[tracker_id][]", 9),
+)
+
+@lru_cache(maxsize=16)
+def _date_filter_params(date_filter: str, today_ordinal: int) -> Dict[str, Any]:
+    """
+    Build Redmine created_on filter parameters for a date range
+    
+    Keyed by the current day's ordinal so cached entries roll over at midnight.
+    The returned dict is shared between callers and must not be mutated.
+    
+    Args:
+        date_filter: "this_week", "last_week", "this_month", "last_month" or "all"
+        today_ordinal: date.today().toordinal()
+        
+    Returns:
+        Filter parameters dict (empty for "all" or unknown filters)
+    """
+    today = date.fromordinal(today_ordinal)
+    this_monday = today - timedelta(days=today.weekday())  # Monday is 0
+    
+    if date_filter == "this_week":
+        this_sunday = this_monday + timedelta(days=6)
+        return {
+            "f[]": "created_on",
+            "op[created_on]": "><",
+            "v[created_on][]": (this_monday.isoformat(), this_sunday.isoformat())
+        }
+    if date_filter == "last_week":
+        last_monday = this_monday - timedelta(days=7)
+        last_sunday = last_monday + timedelta(days=6)
+        return {
+            "f[]": "created_on",
+            "op[created_on]": "><",
+            "v[created_on][]": (last_monday.isoformat(), last_sunday.isoformat())
+        }
+    if date_filter == "this_month":
+        return {
+            "f[]": "created_on",
+            "op[created_on]": ">=",
+            "v[created_on][]": today.replace(day=1).isoformat()
+        }
+    if date_filter == "last_month":
+        start_of_last_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+        return {
+            "f[]": "created_on",
+            "op[created_on]": ">=",
+            "v[created_on][]": start_of_last_month.isoformat()
+        }
+    return {}
+
+@lru_cache(maxsize=64)
+def _filter_param_keys(param_name: str) -> Tuple[str, str]:
+    """Build the operator and value query keys for a Redmine filter field"""
+    return f"op[{param_name}]", f"v[{param_name}][]"
+
+def _parse_redmine_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Redmine ISO 8601 timestamp (fromisoformat accepts the trailing Z on Python 3.11+)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+@dataclass(slots=True)
 class Ticket:
     """Ticket data model representing a Redmine issue"""
     id: int
@@ -55,14 +139,63 @@ class Ticket:
             'updated_on': self.updated_on.isoformat() if self.updated_on else None
         }
 
+def parse_redmine_issue(issue_data: Dict[str, Any]) -> Ticket:
+    """
+    Parse Redmine issue data into Ticket object
+    
+    Args:
+        issue_data: Raw issue data from Redmine API
+    
+    Returns:
+        Ticket object
+    """
+    # Look up each nested reference once; missing or null references use an empty dict
+    get = issue_data.get
+    status = get("status") or _EMPTY_REF
+    priority = get("priority") or _EMPTY_REF
+    tracker = get("tracker") or _EMPTY_REF
+    author = get("author") or _EMPTY_REF
+    assigned_to = get("assigned_to") or _EMPTY_REF
+    project = get("project") or _EMPTY_REF
+    
+    return Ticket(
+        id=get("id", 0),
+        subject=get("subject", ""),
+        description=get("description", ""),
+        status_id=status.get("id", 1),
+        status_name=status.get("name", ""),
+        priority_id=priority.get("id", 2),
+        priority_name=priority.get("name", ""),
+        tracker_id=tracker.get("id", 0),
+        tracker_name=tracker.get("name", ""),
+        author_id=author.get("id", 0),
+        author_name=author.get("name", ""),
+        assigned_to_id=assigned_to.get("id"),
+        assigned_to_name=assigned_to.get("name", ""),
+        project_id=project.get("id", 1),
+        project_name=project.get("name", ""),
+        created_on=_parse_redmine_datetime(get("created_on")),
+        updated_on=_parse_redmine_datetime(get("updated_on"))
+    )
+
 class TicketManager:
     """Manages ticket operations with Redmine API integration"""
     
-    def __init__(self):
-        """Initialize ticket manager"""
-        self.redmine_client = RedmineClient()
-        self.default_project_id = os.getenv("DEFAULT_PROJECT_ID", "1")
-        self.tickets_per_page = int(os.getenv("TICKETS_PER_PAGE", "15"))
+    # Settings are read on access so the shared instance follows admin settings changes
+    @property
+    def redmine_client(self) -> RedmineClient:
+        """Shared Redmine client (follows Redmine URL changes from admin settings)"""
+        return get_redmine_client()
+    
+    @property
+    def default_project_id(self) -> str:
+        """Default project for ticket queries and creation"""
+        return self.redmine_client.default_project_id
+    
+    @property
+    def tickets_per_page(self) -> int:
+        """Page size for ticket listings"""
+        return int(os.getenv("TICKETS_PER_PAGE", "15"))
     
     def get_this_week_date_range(self) -> Tuple[str, str]:
         """
@@ -79,149 +212,69 @@ class TicketManager:
         
         return start_of_week.strftime("%Y-%m-%d"), end_of_week.strftime("%Y-%m-%d")
     
-    def parse_redmine_issue(self, issue_data: Dict[str, Any]) -> Ticket:
-        """
-        Parse Redmine issue data into Ticket object
-        
-        Args:
-            issue_data: Raw issue data from Redmine API
-            
-        Returns:
-            Ticket object
-        """
-        # Parse dates
-        created_on = None
-        updated_on = None
-        
-        if issue_data.get("created_on"):
-            try:
-                created_on = datetime.fromisoformat(issue_data["created_on"].replace('Z', '+00:00'))
-            except ValueError:
-                pass
-        
-        if issue_data.get("updated_on"):
-            try:
-                updated_on = datetime.fromisoformat(issue_data["updated_on"].replace('Z', '+00:00'))
-            except ValueError:
-                pass
-        
-        return Ticket(
-            id=issue_data.get("id", 0),
-            subject=issue_data.get("subject", ""),
-            description=issue_data.get("description", ""),
-            status_id=issue_data.get("status", {}).get("id", 1),
-            status_name=issue_data.get("status", {}).get("name", ""),
-            priority_id=issue_data.get("priority", {}).get("id", 2),
-            priority_name=issue_data.get("priority", {}).get("name", ""),
-            tracker_id=issue_data.get("tracker", {}).get("id", 0),
-            tracker_name=issue_data.get("tracker", {}).get("name", ""),
-            author_id=issue_data.get("author", {}).get("id", 0),
-            author_name=issue_data.get("author", {}).get("name", ""),
-            assigned_to_id=issue_data.get("assigned_to", {}).get("id") if issue_data.get("assigned_to") else None,
-            assigned_to_name=issue_data.get("assigned_to", {}).get("name", "") if issue_data.get("assigned_to") else "",
-            project_id=issue_data.get("project", {}).get("id", 1),
-            project_name=issue_data.get("project", {}).get("name", ""),
-            created_on=created_on,
-            updated_on=updated_on
-        )
+    # Kept as a method for existing callers; the parser itself is module-level
+    parse_redmine_issue = staticmethod(parse_redmine_issue)
     
     def set_params(self, param_name: str, param_value: str | list[str], operator: str = "=") -> list[tuple[str, str]]:
         """
         Set parameters for Redmine API request
         """
-        params: list[tuple[str, str]] = []
-        params.append(("f[]", param_name))
-        params.append((f"op[{param_name}]", operator))
+        op_key, value_key = _filter_param_keys(param_name)
+        params: list[tuple[str, str]] = [("f[]", param_name), (op_key, operator)]
         if isinstance(param_value, list):
-            for value in param_value:
-                params.append((f"v[{param_name}][]", value))
+            params.extend((value_key, value) for value in param_value)
         else:
-            params.append((f"v[{param_name}][]", param_value))
+            params.append((value_key, param_value))
         return params
     
-    def get_tickets(self, username: str = "", password: str = "", 
+    def get_tickets(self, username: str = "", user_api_key: str = "",
                    project_id: Optional[str] = None,
                    assigned_to_me: bool = True,
                    status_filter: str = "open",
                    date_filter: str = "this_week",
                    search_query: str = "",
                    page: int = 1,
-                   use_api_key: bool = True) -> Tuple[List[Ticket], int, Optional[str]]:
+                   use_api_key: bool = True,
+                   per_page: Optional[int] = None) -> Tuple[List[Ticket], int, Optional[str]]:
         """
         Get tickets from Redmine with filtering and pagination
         
         Args:
-            username: Redmine username (optional if using API key)
-            password: Redmine password (optional if using API key)
+            username: Redmine username (used to resolve assignee with system API key)
+            user_api_key: User's personal Redmine API key (optional if using system API key)
             project_id: Project ID filter (uses default if None)
             assigned_to_me: Filter to current user's tickets
             status_filter: Status filter ("open", "closed", "all")
             date_filter: Date filter ("this_week", "last_week", "this_month", "last_month", "all")
             search_query: Search query for id, subject, description
             page: Page number for pagination
-            use_api_key: Use API key authentication instead of user credentials
+            use_api_key: Use system API key instead of the user's personal API key
+            per_page: Page size (uses TICKETS_PER_PAGE if None)
             
         Returns:
             Tuple of (tickets_list, total_count, error_message)
         """
-        # Build date filter parameters
-        date_filter_params = {}
-        if date_filter == "this_week":
-            start_date, end_date = self.get_this_week_date_range()
-            date_filter_params = {
-                "f[]": "created_on",
-                "op[created_on]": "><",
-                "v[created_on][]": [start_date, end_date]
-            }
-        elif date_filter == "last_week":
-            today = datetime.now().date()
-            days_since_monday = today.weekday()
-            this_monday = today - timedelta(days=days_since_monday)
-            last_monday = this_monday - timedelta(days=7)
-            last_sunday = last_monday + timedelta(days=6)
-            
-            date_filter_params = {
-                "f[]": "created_on",
-                "op[created_on]": "><",
-                "v[created_on][]": [
-                    last_monday.strftime("%Y-%m-%d"),
-                    last_sunday.strftime("%Y-%m-%d")
-                ]
-            }
-        elif date_filter == "this_month":
-            today = datetime.now().date()
-            start_of_month = today.replace(day=1)
-            date_filter_params = {
-                "f[]": "created_on",
-                "op[created_on]": ">=",
-                "v[created_on][]": start_of_month.strftime("%Y-%m-%d")
-            }
-        elif date_filter == "last_month":
-            today = datetime.now().date()
-            start_of_month = today.replace(day=1).replace(month=today.month - 1)
-            date_filter_params = {
-                "f[]": "created_on",
-                "op[created_on]": ">=",
-                "v[created_on][]": start_of_month.strftime("%Y-%m-%d")
-            }
+        limit = per_page or self.tickets_per_page
         
-        # Get user ID for assignment filter if using API key
-        assigned_to_user_id = None
-        if use_api_key and assigned_to_me and username:
-            # Get user ID by username
-            user_data = self.redmine_client.get_user_by_login(username)
-            if user_data:
-                assigned_to_user_id = user_data.get("id")
+        # Build date filter parameters (cached per filter and calendar day)
+        date_filter_params = _date_filter_params(date_filter, date.today().toordinal())
         
         try:
             if use_api_key and self.redmine_client.api_key:
+                # Get user ID for assignment filter (only needed on the API key path)
+                assigned_to_user_id = None
+                if assigned_to_me and username:
+                    user_data = self.redmine_client.get_user_by_login(username)
+                    if user_data:
+                        assigned_to_user_id = user_data.get("id")
+                
                 # Use API key method
                 issues = self.redmine_client.get_user_issues_with_api_key(
                     project_id=project_id or self.default_project_id,
                     assigned_to_user_id=assigned_to_user_id if assigned_to_me else None,
                     status_filter=status_filter,
-                    limit=self.tickets_per_page,
-                    offset=(page - 1) * self.tickets_per_page,
+                    limit=limit,
+                    offset=(page - 1) * limit,
                     search_query=search_query,
                     date_filter_params=date_filter_params
                 )
@@ -230,21 +283,21 @@ class TicketManager:
                     return [], 0, "Failed to fetch tickets using API key"
                 
                 # For API key, we don't get total count directly, so we estimate
-                total_count = len(issues) + ((page - 1) * self.tickets_per_page)
-                if len(issues) == self.tickets_per_page:
+                total_count = len(issues) + ((page - 1) * limit)
+                if len(issues) == limit:
                     total_count += 1  # Indicate there might be more
                 
             else:
-                # Use username/password method
-                if not username or not password:
-                    return [], 0, "Username and password required for authentication"
+                # Use personal API key method
+                if not user_api_key:
+                    return [], 0, "Personal Redmine API key required for authentication"
                 
-                api_url = f"{self.redmine_client.base_url}/issues.json"
+                api_url = self.redmine_client.url_issues
                 
                 # Build query parameters
                 params: list[tuple[str, str]] = [
-                    ("limit", self.tickets_per_page),
-                    ("offset", (page - 1) * self.tickets_per_page),
+                    ("limit", limit),
+                    ("offset", (page - 1) * limit),
                     ("sort", "parent:desc"),
                     ("set_filter", 1)
                 ]
@@ -255,11 +308,11 @@ class TicketManager:
                 # Assigned to filter
                 if assigned_to_me:
                     # params["assigned_to_id"] = "me"
-                    params.extend(self.set_params("author_id", "me"))
+                    params.extend(_AUTHOR_ME_PARAMS)
                 
                 # Tracker filter
                 # if tracker_filter:
-                params.extend(self.set_params("tracker_id", [5, 9]))
+                params.extend(_TRACKER_FILTER_PARAMS)
                 
                 # Status filter
                 if status_filter == "open":
@@ -276,26 +329,28 @@ class TicketManager:
                     params.append(("search", search_query))
                 
                 # Make API request
-                response = requests.get(
+                response = self.redmine_client.session.get(
                     api_url,
-                    auth=(username, password),
-                    headers={"Content-Type": "application/json"},
+                    headers=self.redmine_client.auth_headers(user_api_key),
                     params=params,
                     timeout=15
                 )
                 
-                print(f"Request URL: {response.request.url}")
+                logger.debug("Request URL: %s", response.request.url)
                 if response.status_code != 200:
-                    print(f"API request failed: {response.status_code}")
-                    print(f"Response: {response.text}")
+                    logger.warning("API request failed: %s", response.status_code)
+                    logger.debug("Response: %s", response.text)
                     return [], 0, f"API request failed: {response.status_code}"
                 
-                data = response.json()
+                data = json_loads(response.content)
                 issues = data.get("issues", [])
                 total_count = data.get("total_count", 0)
             
+            if not issues:
+                return [], total_count, None
+            
             # Parse issues into Ticket objects
-            tickets = [self.parse_redmine_issue(issue) for issue in issues]
+            tickets = list(map(parse_redmine_issue, issues))
             
             return tickets, total_count, None
             
@@ -307,7 +362,7 @@ class TicketManager:
     def create_ticket(self, subject: str, description: str,
                      candidate_name: str = "", stack: str = "",
                      project_id: Optional[str] = None,
-                     username: str = "", password: str = "",
+                     user_api_key: str = "",
                      use_api_key: bool = True,
                      assigned_to_user_id: Optional[int] = None) -> Tuple[Optional[Ticket], Optional[str]]:
         """
@@ -319,9 +374,8 @@ class TicketManager:
             candidate_name: Candidate name for naming convention
             stack: Technology stack for naming convention
             project_id: Project ID (uses default if None)
-            username: Redmine username (for user auth)
-            password: Redmine password (for user auth)
-            use_api_key: Use API key authentication instead of user credentials
+            user_api_key: User's personal Redmine API key (for user auth)
+            use_api_key: Use system API key instead of the user's personal API key
             assigned_to_user_id: User ID to assign ticket to
             
         Returns:
@@ -346,17 +400,17 @@ class TicketManager:
                 )
                 
                 if created_issue:
-                    ticket = self.parse_redmine_issue(created_issue.get("issue", {}))
+                    ticket = parse_redmine_issue(created_issue.get("issue", {}))
                     return ticket, None
                 else:
                     return None, "Failed to create ticket using API key"
             
             else:
-                # Use username/password method
-                if not username or not password:
-                    return None, "Username and password required for authentication"
+                # Use personal API key method
+                if not user_api_key:
+                    return None, "Personal Redmine API key required for authentication"
                 
-                api_url = f"{self.redmine_client.base_url}/issues.json"
+                api_url = self.redmine_client.url_issues
                 
                 # Prepare issue data
                 issue_data = {
@@ -376,17 +430,16 @@ class TicketManager:
                 else:
                     issue_data["issue"]["assigned_to_id"] = "me"  # Assign to current user
                 
-                response = requests.post(
+                response = self.redmine_client.session.post(
                     api_url,
-                    auth=(username, password),
-                    headers={"Content-Type": "application/json"},
+                    headers=self.redmine_client.auth_headers(user_api_key),
                     json=issue_data,
                     timeout=15
                 )
                 
                 if response.status_code == 201:
-                    created_issue = response.json()
-                    ticket = self.parse_redmine_issue(created_issue.get("issue", {}))
+                    created_issue = json_loads(response.content)
+                    ticket = parse_redmine_issue(created_issue.get("issue", {}))
                     return ticket, None
                 else:
                     return None, f"Failed to create ticket: {response.status_code}"
@@ -396,31 +449,29 @@ class TicketManager:
         except Exception as e:
             return None, f"Error creating ticket: {e}"
     
-    def get_ticket_by_id(self, username: str, password: str, ticket_id: int) -> Tuple[Optional[Ticket], Optional[str]]:
+    def get_ticket_by_id(self, user_api_key: str, ticket_id: int) -> Tuple[Optional[Ticket], Optional[str]]:
         """
         Get a specific ticket by ID
         
         Args:
-            username: Redmine username
-            password: Redmine password
+            user_api_key: User's personal Redmine API key
             ticket_id: Ticket ID
             
         Returns:
             Tuple of (ticket, error_message)
         """
         try:
-            api_url = f"{self.redmine_client.base_url}/issues/{ticket_id}.json"
+            api_url = self.redmine_client.url_issue(ticket_id)
             
-            response = requests.get(
+            response = self.redmine_client.session.get(
                 api_url,
-                auth=(username, password),
-                headers={"Content-Type": "application/json"},
+                headers=self.redmine_client.auth_headers(user_api_key),
                 timeout=10
             )
             
             if response.status_code == 200:
-                data = response.json()
-                ticket = self.parse_redmine_issue(data.get("issue", {}))
+                data = json_loads(response.content)
+                ticket = parse_redmine_issue(data.get("issue", {}))
                 return ticket, None
             else:
                 return None, f"Ticket not found: {response.status_code}"
@@ -428,4 +479,9 @@ class TicketManager:
         except requests.exceptions.RequestException as e:
             return None, f"Network error: {e}"
         except Exception as e:
-            return None, f"Error fetching ticket: {e}" 
\ No newline at end of file
+            return None, f"Error fetching ticket: {e}"
+
+@st.cache_resource
+def get_ticket_manager() -> TicketManager:
+    """Get the shared TicketManager instance"""
+    return TicketManager()
@@ -2,15 +2,60 @@
 User model and database operations for CV Converter Web Application
 """
 
+import csv
 import sqlite3
-import json
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Iterator, TextIO
 from dataclasses import dataclass
 from pathlib import Path
 import os
+from ..utils.json_utils import json_loads, json_dumps
 
-@dataclass
+# Shared UserManager instances per database path
+_user_managers: Dict[str, "UserManager"] = {}
+_user_managers_lock = threading.Lock()
+
+def get_user_manager(db_path: str) -> "UserManager":
+    """Get the shared UserManager for a database path, creating it on first use"""
+    with _user_managers_lock:
+        manager = _user_managers.get(db_path)
+        if manager is None:
+            manager = UserManager(db_path)
+            _user_managers[db_path] = manager
+        return manager
+
+# Hot statements kept as constants so every call hits sqlite3's per-connection statement cache
+_SQL_USER_BY_REDMINE_ID = 'SELECT * FROM users WHERE redmine_user_id = ?'
+_SQL_UPDATE_LAST_LOGIN = 'UPDATE users SET last_login = ? WHERE id = ?'
+_SQL_TOUCH_BY_REDMINE_ID = 'UPDATE users SET last_login = ? WHERE redmine_user_id = ? RETURNING *'
+_SQL_INCREMENT_CONVERSIONS = 'UPDATE users SET conversion_count = conversion_count + 1 WHERE id = ?'
+_SQL_COUNT_USERS = 'SELECT COUNT(*) FROM users'
+_SQL_ALL_USERS = 'SELECT * FROM users ORDER BY created_at DESC'
+
+# Header row for CSV export, matching User.to_row_tuple() and _SQL_EXPORT_USERS
+EXPORT_COLUMNS = ("id", "redmine_user_id", "username", "role", "last_login", "conversion_count", "created_at")
+_SQL_EXPORT_USERS = '''
+    SELECT id, redmine_user_id, username, role,
+           datetime(last_login, 'unixepoch', 'localtime'),
+           conversion_count,
+           datetime(created_at, 'unixepoch', 'localtime')
+    FROM users ORDER BY created_at DESC
+'''
+
+# create_user and touch_and_fetch_by_redmine_id use RETURNING, added in SQLite 3.35
+_MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Columns for list views: everything except the JSON custom_fields blob
+_LITE_COLUMNS = "id, redmine_user_id, username, role, last_login, conversion_count, created_at"
+
+def _unicode_lower(value: Optional[str]) -> Optional[str]:
+    """SQL function lowercasing with Python's Unicode rules (SQLite's lower() only folds ASCII)"""
+    return value.lower() if value else value
+
+@dataclass(slots=True)
 class User:
     """User data model representing a user in the system"""
     id: Optional[int] = None
@@ -18,9 +63,19 @@ class User:
     username: Optional[str] = None
     custom_fields: Optional[Dict[str, Any]] = None
     role: str = "user"  # "admin" or "user"
-    last_login: Optional[datetime] = None
+    last_login: Optional[int] = None  # Unix seconds
     conversion_count: int = 0
-    created_at: Optional[datetime] = None
+    created_at: Optional[int] = None  # Unix seconds
+
+    @property
+    def last_login_dt(self) -> Optional[datetime]:
+        """Last login as a local datetime, built only when displayed"""
+        return datetime.fromtimestamp(self.last_login) if self.last_login is not None else None
+
+    @property
+    def created_at_dt(self) -> Optional[datetime]:
+        """Creation time as a local datetime, built only when displayed"""
+        return datetime.fromtimestamp(self.created_at) if self.created_at is not None else None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert user object to dictionary for JSON serialization"""
@@ -30,30 +85,67 @@ class User:
             'username': self.username,
             'custom_fields': self.custom_fields,
             'role': self.role,
-            'last_login': self.last_login.isoformat() if self.last_login else None,
+            'last_login': self.last_login_dt.isoformat() if self.last_login is not None else None,
             'conversion_count': self.conversion_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at_dt.isoformat() if self.created_at is not None else None
         }
 
+    def to_row_tuple(self) -> Tuple[Any, ...]:
+        """Convert user to a flat tuple in EXPORT_COLUMNS order"""
+        return (
+            self.id,
+            self.redmine_user_id,
+            self.username,
+            self.role,
+            self.last_login_dt.strftime("%Y-%m-%d %H:%M:%S") if self.last_login is not None else None,
+            self.conversion_count,
+            self.created_at_dt.strftime("%Y-%m-%d %H:%M:%S") if self.created_at is not None else None
+        )
+
 class UserManager:
     """Database manager for user operations"""
     
+    # Database paths whose schema was already created/migrated in this process
+    _initialized_paths: set = set()
+    
     def __init__(self, db_path: str):
         """Initialize user manager with database path"""
+        if sqlite3.sqlite_version_info < _MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {'.'.join(map(str, _MIN_SQLITE_VERSION))} or newer is required, "
+                f"found {sqlite3.sqlite_version}"
+            )
         self.db_path = db_path
-        self.ensure_database_exists()
-        self.create_tables()
+        # One connection per manager (and so per database path), shared by all
+        # script threads; statements on it are serialized by _lock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        if db_path not in UserManager._initialized_paths:
+            self.ensure_database_exists()
+            self.create_tables()
+            UserManager._initialized_paths.add(db_path)
 
     def ensure_database_exists(self):
         """Ensure the database directory and file exist"""
         db_dir = Path(self.db_path).parent
         db_dir.mkdir(parents=True, exist_ok=True)
 
-    def get_connection(self) -> sqlite3.Connection:
-        """Get database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    @contextmanager
+    def get_connection(self) -> Iterator[sqlite3.Connection]:
+        """Hold the shared database connection (with row factory) for the duration of the block"""
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                                       cached_statements=128)
+                conn.row_factory = sqlite3.Row
+                conn.create_function("unicode_lower", 1, _unicode_lower, deterministic=True)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache, for the one connection
+                self._conn = conn
+            with self._conn as conn:
+                yield conn
 
     def create_tables(self):
         """Create the users table according to the requirements schema"""
@@ -65,43 +157,46 @@ class UserManager:
                     username TEXT,
                     custom_fields TEXT, -- JSON string of Redmine custom fields
                     role TEXT CHECK(role IN ('admin', 'user')) DEFAULT 'user',
-                    last_login TIMESTAMP,
+                    last_login INTEGER, -- Unix seconds
                     conversion_count INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
                 )
             ''')
+            # Migrate ISO timestamps written by earlier versions (local time) to Unix seconds
+            conn.execute('''
+                UPDATE users SET last_login = CAST(strftime('%s', last_login, 'utc') AS INTEGER)
+                WHERE typeof(last_login) = 'text'
+            ''')
+            conn.execute('''
+                UPDATE users SET created_at = CAST(strftime('%s', created_at, 'utc') AS INTEGER)
+                WHERE typeof(created_at) = 'text'
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)')
             conn.commit()
 
     def create_user(self, redmine_user_id: int, username: str, 
                    custom_fields: Optional[Dict[str, Any]] = None) -> User:
         """Create a new user in the database"""
-        # Check if this is the first user (auto-admin logic)
-        is_first_user = self.get_user_count() == 0
-        role = "admin" if is_first_user else "user"
-        
+        # First user becomes admin; the check and the insert are one atomic statement
         with self.get_connection() as conn:
-            cursor = conn.execute('''
+            row = conn.execute('''
                 INSERT INTO users (redmine_user_id, username, custom_fields, role, created_at)
-                VALUES (?, ?, ?, ?, ?)
+                SELECT ?, ?, ?, CASE WHEN EXISTS (SELECT 1 FROM users) THEN 'user' ELSE 'admin' END, ?
+                RETURNING *
             ''', (
                 redmine_user_id,
                 username,
-                json.dumps(custom_fields) if custom_fields else None,
-                role,
-                datetime.now()
-            ))
-            
-            user_id = cursor.lastrowid
+                json_dumps(custom_fields) if custom_fields else None,
+                int(time.time())
+            )).fetchone()
             conn.commit()
             
-        return self.get_user_by_id(user_id)
+        return self._row_to_user(row)
 
     def get_user_by_redmine_id(self, redmine_user_id: int) -> Optional[User]:
         """Get user by Redmine user ID"""
         with self.get_connection() as conn:
-            row = conn.execute('''
-                SELECT * FROM users WHERE redmine_user_id = ?
-            ''', (redmine_user_id,)).fetchone()
+            row = conn.execute(_SQL_USER_BY_REDMINE_ID, (redmine_user_id,)).fetchone()
             
             if row:
                 return self._row_to_user(row)
@@ -132,18 +227,24 @@ class UserManager:
     def update_last_login(self, user_id: int) -> bool:
         """Update user's last login timestamp"""
         with self.get_connection() as conn:
-            cursor = conn.execute('''
-                UPDATE users SET last_login = ? WHERE id = ?
-            ''', (datetime.now(), user_id))
+            cursor = conn.execute(_SQL_UPDATE_LAST_LOGIN, (int(time.time()), user_id))
             conn.commit()
             return cursor.rowcount > 0
 
+    def touch_and_fetch_by_redmine_id(self, redmine_user_id: int) -> Optional[User]:
+        """Update last login for a Redmine user and return the updated row in one statement"""
+        with self.get_connection() as conn:
+            row = conn.execute(_SQL_TOUCH_BY_REDMINE_ID, (int(time.time()), redmine_user_id)).fetchone()
+            conn.commit()
+            
+            if row:
+                return self._row_to_user(row)
+            return None
+
     def increment_conversion_count(self, user_id: int) -> bool:
         """Increment user's conversion count"""
         with self.get_connection() as conn:
-            cursor = conn.execute('''
-                UPDATE users SET conversion_count = conversion_count + 1 WHERE id = ?
-            ''', (user_id,))
+            cursor = conn.execute(_SQL_INCREMENT_CONVERSIONS, (user_id,))
             conn.commit()
             return cursor.rowcount > 0
 
@@ -159,19 +260,134 @@ class UserManager:
             conn.commit()
             return cursor.rowcount > 0
 
+    def bulk_update_roles(self, updates: List[Tuple[int, str]]) -> int:
+        """Update several users' roles in one statement; returns the number of rows changed"""
+        if not updates or any(role not in ['admin', 'user'] for _, role in updates):
+            return 0
+        
+        cases = " ".join("WHEN ? THEN ?" for _ in updates)
+        placeholders = ", ".join("?" for _ in updates)
+        params = [value for update in updates for value in update]
+        params.extend(user_id for user_id, _ in updates)
+        
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                UPDATE users SET role = CASE id {cases} END WHERE id IN ({placeholders})
+            ''', params)
+            conn.commit()
+            return cursor.rowcount
+
+    def bulk_delete_users(self, user_ids: List[int]) -> int:
+        """Delete several users in one statement; returns the number of rows deleted"""
+        if not user_ids:
+            return 0
+        
+        placeholders = ", ".join("?" for _ in user_ids)
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'DELETE FROM users WHERE id IN ({placeholders})', list(user_ids))
+            conn.commit()
+            return cursor.rowcount
+
     def get_all_users(self) -> List[User]:
         """Get all users (admin only)"""
         with self.get_connection() as conn:
-            rows = conn.execute('''
-                SELECT * FROM users ORDER BY created_at DESC
-            ''').fetchall()
+            rows = conn.execute(_SQL_ALL_USERS).fetchall()
             
             return [self._row_to_user(row) for row in rows]
 
+    def iter_users_lite(self) -> Iterator[User]:
+        """Stream all users without custom_fields, newest first"""
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'SELECT {_LITE_COLUMNS} FROM users ORDER BY created_at DESC')
+        yield from self._iter_lite_rows(cursor)
+
+    def export_csv(self, file_like: TextIO):
+        """Write all users as CSV straight from the cursor, without building User objects"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(_SQL_EXPORT_USERS)
+            
+            writer = csv.writer(file_like)
+            writer.writerow(EXPORT_COLUMNS)
+            writer.writerows(cursor)
+
+    def get_user_custom_fields(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get a single user's custom fields (loaded on demand by the admin list)"""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                'SELECT custom_fields FROM users WHERE id = ?', (user_id,)
+            ).fetchone()
+        return json_loads(row[0]) if row and row[0] else None
+
+    def _iter_lite_rows(self, cursor: sqlite3.Cursor) -> Iterator[User]:
+        """Build User objects positionally from _LITE_COLUMNS rows in fetchmany batches"""
+        cursor.row_factory = None
+        cursor.arraysize = 500
+        while True:
+            # Only each batch fetch holds the connection, not the consumer's work between batches
+            with self._lock:
+                rows = cursor.fetchmany()
+            if not rows:
+                break
+            for user_id, redmine_user_id, username, role, last_login, conversion_count, created_at in rows:
+                yield User(user_id, redmine_user_id, username, None, role,
+                           last_login, conversion_count, created_at)
+
+    @staticmethod
+    def _search_filter(search: str, role: Optional[str]) -> tuple:
+        """Build WHERE clause parameters for username search and role filter"""
+        return (search, search.lower(), role, role)
+
+    def search_users(self, search: str = "", role: Optional[str] = None,
+                     limit: int = 20, offset: int = 0) -> List[User]:
+        """
+        Get users whose username contains search (case-insensitive), optionally filtered by role
+        
+        custom_fields is not loaded; use get_user_custom_fields() for a single user
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                SELECT {_LITE_COLUMNS} FROM users
+                WHERE (? = '' OR instr(unicode_lower(username), ?) > 0)
+                  AND (? IS NULL OR role = ?)
+                ORDER BY created_at DESC
+                LIMIT ? OFFSET ?
+            ''', (*self._search_filter(search, role), limit, offset))
+            return list(self._iter_lite_rows(cursor))
+
+    def count_users(self, search: str = "", role: Optional[str] = None) -> int:
+        """Count users matching the same filters as search_users"""
+        with self.get_connection() as conn:
+            result = conn.execute('''
+                SELECT COUNT(*) FROM users
+                WHERE (? = '' OR instr(unicode_lower(username), ?) > 0)
+                  AND (? IS NULL OR role = ?)
+            ''', self._search_filter(search, role)).fetchone()
+            return result[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get user totals for the admin metrics in a single aggregate query"""
+        with self.get_connection() as conn:
+            row = conn.execute('''
+                SELECT COUNT(*),
+                       COALESCE(SUM(role = 'admin'), 0),
+                       COALESCE(SUM(role = 'user'), 0),
+                       COALESCE(SUM(conversion_count), 0)
+                FROM users
+            ''').fetchone()
+            
+            return {
+                'total_users': row[0],
+                'admin_count': row[1],
+                'regular_count': row[2],
+                'total_conversions': row[3]
+            }
+
     def get_user_count(self) -> int:
         """Get total number of users"""
         with self.get_connection() as conn:
-            result = conn.execute('SELECT COUNT(*) FROM users').fetchone()
+            result = conn.execute(_SQL_COUNT_USERS).fetchone()
             return result[0]
 
     def _row_to_user(self, row: sqlite3.Row) -> User:
@@ -180,11 +396,11 @@ class UserManager:
             id=row['id'],
             redmine_user_id=row['redmine_user_id'],
             username=row['username'],
-            custom_fields=json.loads(row['custom_fields']) if row['custom_fields'] else None,
+            custom_fields=json_loads(row['custom_fields']) if row['custom_fields'] else None,
             role=row['role'],
-            last_login=datetime.fromisoformat(row['last_login']) if row['last_login'] else None,
+            last_login=row['last_login'],
             conversion_count=row['conversion_count'],
-            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
+            created_at=row['created_at']
         )
 
     def delete_user(self, user_id: int) -> bool:
@@ -3,25 +3,66 @@ Admin settings page for CV Converter Web Application
 Allows admin users to configure system settings and environment variables
 """
 
+import os
+import re
 import streamlit as st
 from datetime import datetime
-from ..auth.auth_service import AuthService
-from ..utils.env_manager import EnvManager
+from typing import Any, Dict
+from ..auth.auth_service import get_auth_service
+from ..utils.env_manager import get_env_manager
 from ..utils.helpers import (
-    show_success_message, show_error_message, show_warning_message, show_info_message
+    show_success_message, show_error_message, show_warning_message, show_info_message, navigate_to
 )
 
+def _env_mtime_ns(env_file_path: str) -> int:
+    """Modification time of the .env file in ns, 0 if it does not exist"""
+    try:
+        return os.stat(env_file_path).st_mtime_ns
+    except OSError:
+        return 0
+
+@st.cache_data(ttl=30, max_entries=4)
+def _load_env_status_cached(env_file_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Load environment status; mtime_ns is part of the cache key so edits to
+    the file invalidate it, and it is also cleared after saves or resets
+    """
+    return get_env_manager(env_file_path).get_env_status()
+
+# Lines whose key looks sensitive are redacted in the .env preview
+_SENSITIVE_RE = re.compile(r"SECRET|KEY|TOKEN")
+
+@st.cache_data(ttl=60, max_entries=4)
+def _load_env_preview(path: str, mtime: float) -> str:
+    """Read the .env file and redact sensitive values; mtime is part of the cache key"""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    
+    preview_lines = []
+    for line in lines:
+        # Hide sensitive values
+        if _SENSITIVE_RE.search(line):
+            if "=" in line:
+                key_part = line.split("=")[0]
+                preview_lines.append(f"{key_part}=***HIDDEN***\n")
+            else:
+                preview_lines.append("***HIDDEN***\n")
+        else:
+            preview_lines.append(line)
+    
+    return "".join(preview_lines)
+
 def show_admin_settings():
     """Display the admin settings page"""
     # Initialize auth service and require admin access
-    auth_service = AuthService()
+    auth_service = get_auth_service()
     auth_service.require_admin()
     
     # Get current user
     current_user = auth_service.get_current_user()
     
     # Initialize environment manager
-    env_manager = EnvManager()
+    env_manager = get_env_manager()
     
     # Page header
     st.title("⚙️ System Settings")
@@ -32,17 +73,11 @@ def show_admin_settings():
     with st.sidebar:
         st.markdown("### 🧭 Navigation")
         
-        if st.button("🏠 Dashboard", use_container_width=True):
-            st.query_params.page = "dashboard"
-            st.rerun()
+        st.button("🏠 Dashboard", use_container_width=True, on_click=navigate_to, args=("dashboard",))
         
-        if st.button("👥 User Management", use_container_width=True):
-            st.query_params.page = "admin_users"
-            st.rerun()
+        st.button("👥 User Management", use_container_width=True, on_click=navigate_to, args=("admin_users",))
         
-        if st.button("🔄 CV Converter", use_container_width=True):
-            st.query_params.page = "converter"
-            st.rerun()
+        st.button("🔄 CV Converter", use_container_width=True, on_click=navigate_to, args=("converter",))
         
         st.markdown("---")
         
@@ -54,7 +89,9 @@ def show_admin_settings():
     # Environment status overview
     st.markdown("### 📊 Environment Status")
     
-    env_status = env_manager.get_env_status()
+    env_status = _load_env_status_cached(
+        env_manager.env_file_path, _env_mtime_ns(env_manager.env_file_path)
+    )
     
     # Status indicators
     col1, col2, col3, col4 = st.columns(4)
@@ -142,31 +179,32 @@ def show_admin_settings():
         
         # Handle form submissions
         if save_button:
-            success_count = 0
-            error_count = 0
+            # Only changed settings are written, all in one .env rewrite
+            changes = {
+                var_name: str(new_value)
+                for var_name, new_value in updated_values.items()
+                if str(new_value) != str(env_status["configurable_vars"][var_name]["value"])
+            }
             
-            for var_name, new_value in updated_values.items():
-                success, error = env_manager.update_env_var(var_name, str(new_value))
+            if not changes:
+                show_info_message("No changes were made")
+            else:
+                success, error = env_manager.update_env_vars(changes)
                 if success:
-                    success_count += 1
+                    show_success_message(f"Successfully updated {len(changes)} setting(s)")
+                    # Hot-reload environment
+                    env_manager.reload_env()
+                    _load_env_status_cached.clear()
+                    st.rerun()
                 else:
-                    show_error_message(f"Failed to update {var_name}: {error}")
-                    error_count += 1
-            
-            if success_count > 0:
-                show_success_message(f"Successfully updated {success_count} setting(s)")
-                # Hot-reload environment
-                env_manager.reload_env()
-                st.rerun()
-            
-            if error_count == 0 and success_count == 0:
-                show_info_message("No changes were made")
+                    show_error_message(f"Failed to update settings: {error}")
         
         if reset_button:
             success, error = env_manager.reset_to_defaults()
             if success:
                 show_success_message("All settings reset to defaults")
                 env_manager.reload_env()
+                _load_env_status_cached.clear()
                 st.rerun()
             else:
                 show_error_message(f"Failed to reset settings: {error}")
@@ -197,7 +235,7 @@ def show_admin_settings():
     with col1:
         if st.button("🧪 Test Connection", type="primary"):
             with st.spinner("Testing Redmine connection..."):
-                connection_ok = auth_service.test_redmine_connection()
+                connection_ok = auth_service.test_redmine_connection(use_cache=False)
             
             if connection_ok:
                 show_success_message("Redmine connection successful!")
@@ -221,23 +259,8 @@ def show_admin_settings():
         if env_status["file_exists"]:
             st.markdown("**File Contents Preview (non-sensitive):**")
             try:
-                with open(env_manager.env_file_path, 'r') as f:
-                    lines = f.readlines()
-                
-                preview_lines = []
-                for line in lines:
-                    # Hide sensitive values
-                    if any(sensitive in line for sensitive in ["SECRET", "KEY", "TOKEN"]):
-                        if "=" in line:
-                            key_part = line.split("=")[0]
-                            preview_lines.append(f"{key_part}=***HIDDEN***\n")
-                        else:
-                            preview_lines.append("***HIDDEN***\n")
-                    else:
-                        preview_lines.append(line)
-                
-                st.code("".join(preview_lines))
-                
+                env_file_path = env_manager.env_file_path
+                st.code(_load_env_preview(env_file_path, os.path.getmtime(env_file_path)))
             except Exception as e:
                 st.error(f"Cannot read file: {e}")
         
@@ -3,131 +3,64 @@ Admin user management page for CV Converter Web Application
 Allows admin users to view and manage user accounts and roles
 """
 
+import io
+import os
 import streamlit as st
-from ..auth.auth_service import AuthService
+from datetime import datetime
+from typing import Dict
+from ..auth.auth_service import get_auth_service
+from ..models.user import get_user_manager
 from ..utils.helpers import (
-    show_success_message, show_error_message, display_user_card, format_datetime
+    show_success_message, show_error_message, display_user_card, format_datetime, navigate_to,
+    render_user_table
 )
 
-def show_admin_users():
-    """Display the admin user management page"""
-    # Initialize auth service and require admin access
-    auth_service = AuthService()
-    auth_service.require_admin()
-    
-    # Get current user
-    current_user = auth_service.get_current_user()
-    
-    # Page header
-    st.title("👥 User Management")
-    st.markdown(f"Managing users | Logged in as **{current_user.username}** (Admin)")
-    st.markdown("---")
-    
-    # Sidebar navigation
-    with st.sidebar:
-        st.markdown("### 🧭 Navigation")
-        
-        if st.button("🏠 Dashboard", use_container_width=True):
-            st.query_params.page = "dashboard"
-            st.rerun()
-        
-        if st.button("🔄 CV Converter", use_container_width=True):
-            st.query_params.page = "converter"
-            st.rerun()
-        
-        st.markdown("---")
-        
-        # Logout button
-        if st.button("🔓 Logout", use_container_width=True):
-            auth_service.logout()
-            st.rerun()
-    
-    # Load all users
-    try:
-        all_users = auth_service.user_manager.get_all_users()
-    except Exception as e:
-        show_error_message(f"Error loading users: {e}")
-        return
-    
-    # Statistics summary
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Total Users", len(all_users))
-    
-    with col2:
-        admin_count = len([u for u in all_users if u.role == "admin"])
-        st.metric("Admins", admin_count)
-    
-    with col3:
-        regular_count = len([u for u in all_users if u.role == "user"])
-        st.metric("Regular Users", regular_count)
-    
-    with col4:
-        total_conversions = sum(user.conversion_count for user in all_users)
-        st.metric("Total Conversions", total_conversions)
-    
-    st.markdown("---")
-    
-    # User management section
-    st.markdown("### 👤 User List")
-    
-    if not all_users:
-        st.info("No users found in the system.")
-        return
-    
-    # Search and filter
-    search_col, filter_col = st.columns([2, 1])
-    
-    with search_col:
-        search_term = st.text_input(
-            "🔍 Search users",
-            placeholder="Search by username...",
-            help="Filter users by username"
-        )
-    
-    with filter_col:
-        role_filter = st.selectbox(
-            "Filter by role",
-            options=["All", "Admin", "User"],
-            help="Filter users by their role"
-        )
-    
-    # Filter users based on search and role filter
-    filtered_users = all_users
-    
-    if search_term:
-        filtered_users = [
-            user for user in filtered_users 
-            if search_term.lower() in user.username.lower()
-        ]
-    
-    if role_filter != "All":
-        filtered_users = [
-            user for user in filtered_users 
-            if user.role == role_filter.lower()
-        ]
-    
-    # Display filtered users
-    if not filtered_users:
-        st.info("No users match your search criteria.")
-        return
-    
-    # Handle user actions
-    if "user_action" not in st.session_state:
-        st.session_state.user_action = None
-        st.session_state.user_action_id = None
-    
-    # Display user cards
-    for user in filtered_users:
+# Session state used by the delete / bulk action confirmation flow
+_ACTION_STATE_KEYS = ("user_action", "user_action_id", "user_to_delete")
+
+# Number of user cards shown per page
+USERS_PER_PAGE = 25
+
+def _db_mtime(db_path: str) -> float:
+    """Latest modification time of the database, including its WAL file"""
+    mtime = 0.0
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            mtime = max(mtime, os.path.getmtime(path))
+        except OSError:
+            pass
+    return mtime
+
+@st.cache_data(ttl=30, max_entries=4)
+def _load_user_stats_cached(db_path: str, db_mtime: float) -> Dict[str, int]:
+    """Load user totals; db_mtime is part of the cache key so writes invalidate it"""
+    return get_user_manager(db_path).get_stats()
+
+def load_user_stats(auth_service) -> Dict[str, int]:
+    """Get user totals, reusing the cached result until the database changes"""
+    db_path = auth_service.user_manager.db_path
+    return _load_user_stats_cached(db_path, _db_mtime(db_path))
+
+def _change_page(delta: int):
+    """Move the user list page by delta (button callback, runs before the rerun)"""
+    st.session_state.admin_users_page = st.session_state.get("admin_users_page", 1) + delta
+
+def _render_user_cards(auth_service, current_user, users):
+    """Render one card per user with selection, details and action buttons"""
+    now = datetime.now()
+    for user in users:
         with st.container():
             # User information display
             col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
             
             with col1:
+                if user.id != current_user.id:
+                    st.checkbox("Select", key=f"select_{user.id}")
                 st.write(f"**{user.username}**")
-                if user.custom_fields:
-                    for key, value in user.custom_fields.items():
+                # Custom fields are loaded only for users whose details are shown
+                if st.toggle("Details", key=f"details_{user.id}"):
+                    custom_fields = auth_service.user_manager.get_user_custom_fields(user.id)
+                    for key, value in (custom_fields or {}).items():
                         if value:  # Only show non-empty fields
                             st.write(f"*{key}*: {value}")
             
@@ -138,7 +71,7 @@ def show_admin_users():
             
             with col3:
                 st.write(f"Conversions: {user.conversion_count}")
-                st.write(f"Last Login: {format_datetime(user.last_login)}")
+                st.write(f"Last Login: {format_datetime(user.last_login_dt, now)}")
             
             with col4:
                 # Action buttons (don't show for current user)
@@ -147,6 +80,7 @@ def show_admin_users():
                     if user.role == "user":
                         if st.button(f"🔼 Make Admin", key=f"promote_{user.id}"):
                             if auth_service.user_manager.update_user_role(user.id, "admin"):
+                                _load_user_stats_cached.clear()
                                 show_success_message(f"Promoted {user.username} to admin")
                                 st.rerun()
                             else:
@@ -155,6 +89,7 @@ def show_admin_users():
                     elif user.role == "admin":
                         if st.button(f"🔽 Remove Admin", key=f"demote_{user.id}"):
                             if auth_service.user_manager.update_user_role(user.id, "user"):
+                                _load_user_stats_cached.clear()
                                 show_success_message(f"Removed admin privileges from {user.username}")
                                 st.rerun()
                             else:
@@ -165,11 +100,157 @@ def show_admin_users():
                         st.session_state.user_action = "delete"
                         st.session_state.user_action_id = user.id
                         st.session_state.user_to_delete = user.username
-                        st.rerun()
+                        st.rerun(scope="fragment")
                 else:
                     st.write("*(Current User)*")
         
         st.divider()
+
+@st.fragment
+def _user_list_fragment(auth_service, current_user):
+    """
+    Render search, filters, user cards and user actions
+    
+    Runs as a fragment so filter and page changes rerun only this section;
+    actions that change users call st.rerun() for a full rerun so the
+    metrics above are refreshed
+    """
+    # Search and filter
+    search_col, filter_col = st.columns([2, 1])
+    
+    with search_col:
+        search_term = st.text_input(
+            "🔍 Search users",
+            placeholder="Search by username...",
+            help="Filter users by username"
+        )
+    
+    with filter_col:
+        role_filter = st.selectbox(
+            "Filter by role",
+            options=["All", "Admin", "User"],
+            help="Filter users by their role"
+        )
+        st.toggle("Compact table", key="admin_users_table_view",
+                  help="Show the page as one table; select rows for bulk actions")
+    
+    # Filter and paginate in SQL so only the displayed page is loaded
+    search = search_term.strip()
+    role = None if role_filter == "All" else role_filter.lower()
+    match_count = auth_service.user_manager.count_users(search, role)
+    
+    # Display filtered users
+    if match_count == 0:
+        st.info("No users match your search criteria.")
+        return
+    
+    # Only the current page of user cards is queried and rendered
+    total_pages = (match_count + USERS_PER_PAGE - 1) // USERS_PER_PAGE
+    page = min(max(st.session_state.get("admin_users_page", 1), 1), total_pages)
+    st.session_state.admin_users_page = page
+    
+    if total_pages > 1:
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        
+        with prev_col:
+            st.button("◀ Previous", disabled=page <= 1, on_click=_change_page, args=(-1,),
+                      use_container_width=True)
+        
+        with page_col:
+            page = st.number_input(
+                f"Page (of {total_pages})",
+                min_value=1,
+                max_value=total_pages,
+                step=1,
+                key="admin_users_page"
+            )
+        
+        with next_col:
+            st.button("Next ▶", disabled=page >= total_pages, on_click=_change_page, args=(1,),
+                      use_container_width=True)
+    
+    filtered_users = auth_service.user_manager.search_users(
+        search, role, limit=USERS_PER_PAGE, offset=(page - 1) * USERS_PER_PAGE
+    )
+    
+    # Display users as a compact table or as cards with per-user actions;
+    # the table key follows the page and filters so row selections don't carry over
+    table_key = f"admin_users_table_{page}_{role}_{search}"
+    if st.session_state.get("admin_users_table_view"):
+        selected_users = [
+            user for user in render_user_table(filtered_users, key=table_key)
+            if user.id != current_user.id
+        ]
+    else:
+        _render_user_cards(auth_service, current_user, filtered_users)
+        selected_users = [
+            user for user in filtered_users
+            if st.session_state.get(f"select_{user.id}")
+        ]
+    
+    # Bulk actions for the selected users on this page
+    
+    if selected_users:
+        action_col, apply_col = st.columns([2, 1])
+        
+        with action_col:
+            bulk_action = st.selectbox(
+                f"Action for {len(selected_users)} selected user(s)",
+                options=["Make Admin", "Remove Admin", "Delete"]
+            )
+        
+        with apply_col:
+            if st.button("✅ Apply to selected", use_container_width=True):
+                if bulk_action == "Delete":
+                    st.session_state.user_action = "bulk_delete"
+                    st.session_state.user_action_id = [user.id for user in selected_users]
+                    st.session_state.user_to_delete = ", ".join(user.username for user in selected_users)
+                else:
+                    new_role = "admin" if bulk_action == "Make Admin" else "user"
+                    updated = auth_service.user_manager.bulk_update_roles(
+                        [(user.id, new_role) for user in selected_users]
+                    )
+                    _load_user_stats_cached.clear()
+                    show_success_message(f"Updated role for {updated} user(s)")
+                    for user in selected_users:
+                        st.session_state.pop(f"select_{user.id}", None)
+                    st.session_state.pop(table_key, None)
+                st.rerun()
+    
+    # Confirmation dialog for bulk deletion
+    if st.session_state.user_action == "bulk_delete":
+        st.markdown("---")
+        st.error(f"⚠️ **Confirm User Deletion**")
+        st.write(f"Are you sure you want to delete users **{st.session_state.user_to_delete}**?")
+        st.write("This action cannot be undone.")
+        
+        col1, col2, col3 = st.columns([1, 1, 2])
+        
+        with col1:
+            if st.button("✅ Yes, Delete", type="primary"):
+                deleted = auth_service.user_manager.bulk_delete_users(st.session_state.user_action_id)
+                if deleted:
+                    _load_user_stats_cached.clear()
+                    show_success_message(f"{deleted} user(s) deleted successfully")
+                else:
+                    show_error_message("Failed to delete users")
+                
+                # Clear action and selection state
+                for user_id in st.session_state.user_action_id:
+                    st.session_state.pop(f"select_{user_id}", None)
+                st.session_state.pop(table_key, None)
+                st.session_state.user_action = None
+                st.session_state.user_action_id = None
+                st.session_state.user_to_delete = None
+                st.rerun()
+        
+        with col2:
+            if st.button("❌ Cancel"):
+                # Clear action state
+                st.session_state.user_action = None
+                st.session_state.user_action_id = None
+                st.session_state.user_to_delete = None
+                st.rerun(scope="fragment")
     
     # Confirmation dialog for user deletion
     if st.session_state.user_action == "delete":
@@ -183,6 +264,7 @@ def show_admin_users():
         with col1:
             if st.button("✅ Yes, Delete", type="primary"):
                 if auth_service.user_manager.delete_user(st.session_state.user_action_id):
+                    _load_user_stats_cached.clear()
                     show_success_message(f"User {st.session_state.user_to_delete} deleted successfully")
                 else:
                     show_error_message("Failed to delete user")
@@ -199,7 +281,74 @@ def show_admin_users():
                 st.session_state.user_action = None
                 st.session_state.user_action_id = None
                 st.session_state.user_to_delete = None
-                st.rerun()
+                st.rerun(scope="fragment")
+
+def show_admin_users():
+    """Display the admin user management page"""
+    # Initialize auth service and require admin access
+    auth_service = get_auth_service()
+    auth_service.require_admin()
+    
+    # Default user action state (no-op once the keys exist)
+    for key in _ACTION_STATE_KEYS:
+        st.session_state.setdefault(key, None)
+    
+    # Get current user (memoized per token in session state, no DB lookup)
+    current_user = auth_service.get_current_user()
+    
+    # Page header
+    st.title("👥 User Management")
+    st.markdown(f"Managing users | Logged in as **{current_user.username}** (Admin)")
+    st.markdown("---")
+    
+    # Sidebar navigation
+    with st.sidebar:
+        st.markdown("### 🧭 Navigation")
+        
+        st.button("🏠 Dashboard", use_container_width=True, on_click=navigate_to, args=("dashboard",))
+        
+        st.button("🔄 CV Converter", use_container_width=True, on_click=navigate_to, args=("converter",))
+        
+        st.markdown("---")
+        
+        # Logout button
+        if st.button("🔓 Logout", use_container_width=True):
+            auth_service.logout()
+            st.rerun()
+    
+    # Load user totals
+    try:
+        stats = load_user_stats(auth_service)
+    except Exception as e:
+        show_error_message(f"Error loading users: {e}")
+        return
+    
+    # Statistics summary
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Users", stats["total_users"])
+    
+    with col2:
+        st.metric("Admins", stats["admin_count"])
+    
+    with col3:
+        st.metric("Regular Users", stats["regular_count"])
+    
+    with col4:
+        st.metric("Total Conversions", stats["total_conversions"])
+    
+    st.markdown("---")
+    
+    # User management section
+    st.markdown("### 👤 User List")
+    
+    if not stats["total_users"]:
+        st.info("No users found in the system.")
+        return
+    
+    # User list reruns on its own when searching, filtering or paging
+    _user_list_fragment(auth_service, current_user)
     
     # Additional admin tools
     st.markdown("---")
@@ -209,17 +358,26 @@ def show_admin_users():
     
     with col1:
         if st.button("🔄 Refresh User List", use_container_width=True):
+            _load_user_stats_cached.clear()
             st.rerun()
     
     with col2:
         if st.button("📊 Export User Data", use_container_width=True):
-            st.info("📋 User data export feature coming soon!")
+            buffer = io.StringIO()
+            auth_service.user_manager.export_csv(buffer)
+            st.download_button(
+                "⬇️ Download users.csv",
+                data=buffer.getvalue(),
+                file_name="users.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
     
     # Footer
     st.markdown("---")
     st.markdown(
         "<div style='text-align: center; color: gray;'>"
-        f"User Management | {len(all_users)} total users"
+        f"User Management | {stats['total_users']} total users"
         "</div>", 
         unsafe_allow_html=True
     )
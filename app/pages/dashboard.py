@@ -4,20 +4,44 @@ Shows different content based on user role (admin/user)
 """
 
 import streamlit as st
-from ..auth.auth_service import AuthService
+from datetime import datetime
+from ..auth.auth_service import get_auth_service
+from .admin_users import load_user_stats
 from ..utils.helpers import (
     show_success_message, show_error_message, format_datetime,
-    init_session_state_defaults
+    init_session_state_defaults, navigate_to
+)
+
+# Quick action card markup, built once at import
+_ACTION_CARD_TEMPLATE = (
+    '<div style="padding: 1rem; border: 2px solid {color}; border-radius: 10px; '
+    'text-align: center; margin-bottom: 1rem;">'
+    '<h4>{title}</h4><p>{text}</p></div>'
+)
+_CARD_CONVERT = _ACTION_CARD_TEMPLATE.format(
+    color="#4CAF50", title="📄 Convert CV", text="Upload and convert your CV to corporate format"
+)
+_CARD_HISTORY = _ACTION_CARD_TEMPLATE.format(
+    color="#2196F3", title="📋 View History", text="See your previous conversions and downloads"
+)
+_CARD_USERS = _ACTION_CARD_TEMPLATE.format(
+    color="#FF9800", title="👥 Manage Users", text="View and manage user accounts and roles"
+)
+_CARD_SETTINGS = _ACTION_CARD_TEMPLATE.format(
+    color="#9C27B0", title="⚙️ System Settings", text="Configure application settings and integrations"
 )
 
 def show_dashboard():
     """Display the main dashboard with role-based content"""
     # Initialize auth service and require authentication
-    auth_service = AuthService()
+    auth_service = get_auth_service()
     auth_service.require_authentication()
     
-    # Get current user
-    current_user = auth_service.get_current_user()
+    # Get current user with persisted stats (conversion count, last login)
+    current_user = auth_service.get_current_user_fresh()
+    if current_user is None:
+        st.error("🔒 Please log in to access this page")
+        st.stop()
     
     # Initialize session state
     init_session_state_defaults()
@@ -32,33 +56,28 @@ def show_dashboard():
     # User info sidebar
     with st.sidebar:
         st.markdown("### 👤 User Information")
-        st.write(f"**Username:** {current_user.username}")
-        st.write(f"**Role:** {current_user.role.title()}")
-        st.write(f"**Conversions:** {current_user.conversion_count}")
-        st.write(f"**Last Login:** {format_datetime(current_user.last_login)}")
-        st.write(f"**Member Since:** {format_datetime(current_user.created_at)}")
+        now = datetime.now()
+        st.markdown(
+            f"**Username:** {current_user.username}\n\n"
+            f"**Role:** {current_user.role.title()}\n\n"
+            f"**Conversions:** {current_user.conversion_count}\n\n"
+            f"**Last Login:** {format_datetime(current_user.last_login_dt, now)}\n\n"
+            f"**Member Since:** {format_datetime(current_user.created_at_dt, now)}"
+        )
         
         st.markdown("---")
         
         # Navigation
         st.markdown("### 🧭 Navigation")
         
-        if st.button("🎫 Tickets", use_container_width=True):
-            st.query_params.page = "tickets"
-            st.rerun()
+        st.button("🎫 Tickets", use_container_width=True, on_click=navigate_to, args=("tickets",))
         
-        if st.button("🔄 CV Converter", use_container_width=True):
-            st.query_params.page = "converter"
-            st.rerun()
+        st.button("🔄 CV Converter", use_container_width=True, on_click=navigate_to, args=("converter",))
         
         if current_user.role == "admin":
-            if st.button("👥 User Management", use_container_width=True):
-                st.query_params.page = "admin_users"
-                st.rerun()
+            st.button("👥 User Management", use_container_width=True, on_click=navigate_to, args=("admin_users",))
                 
-            if st.button("⚙️ Settings", use_container_width=True):
-                st.query_params.page = "admin_settings"
-                st.rerun()
+            st.button("⚙️ Settings", use_container_width=True, on_click=navigate_to, args=("admin_settings",))
         
         st.markdown("---")
         
@@ -79,25 +98,13 @@ def show_dashboard():
             
             with action_col1:
                 with st.container():
-                    st.markdown("""
-                    <div style="padding: 1rem; border: 2px solid #4CAF50; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
-                        <h4>📄 Convert CV</h4>
-                        <p>Upload and convert your CV to corporate format</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(_CARD_CONVERT, unsafe_allow_html=True)
                     
-                    if st.button("Start Conversion", key="start_conversion", type="primary", use_container_width=True):
-                        st.query_params.page = "converter"
-                        st.rerun()
+                    st.button("Start Conversion", key="start_conversion", type="primary", use_container_width=True, on_click=navigate_to, args=("converter",))
             
             with action_col2:
                 with st.container():
-                    st.markdown("""
-                    <div style="padding: 1rem; border: 2px solid #2196F3; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
-                        <h4>📋 View History</h4>
-                        <p>See your previous conversions and downloads</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(_CARD_HISTORY, unsafe_allow_html=True)
                     
                     if st.button("View History", key="view_history", use_container_width=True):
                         st.info("📝 Conversion history feature coming soon!")
@@ -110,25 +117,13 @@ def show_dashboard():
             
             with admin_col1:
                 with st.container():
-                    st.markdown("""
-                    <div style="padding: 1rem; border: 2px solid #FF9800; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
-                        <h4>👥 Manage Users</h4>
-                        <p>View and manage user accounts and roles</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(_CARD_USERS, unsafe_allow_html=True)
                     
-                    if st.button("Manage Users", key="manage_users", use_container_width=True):
-                        st.query_params.page = "admin_users"
-                        st.rerun()
+                    st.button("Manage Users", key="manage_users", use_container_width=True, on_click=navigate_to, args=("admin_users",))
             
             with admin_col2:
                 with st.container():
-                    st.markdown("""
-                    <div style="padding: 1rem; border: 2px solid #9C27B0; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
-                        <h4>⚙️ System Settings</h4>
-                        <p>Configure application settings and integrations</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(_CARD_SETTINGS, unsafe_allow_html=True)
                     
                     if st.button("System Settings", key="system_settings", use_container_width=True):
                         st.info("⚙️ System settings feature coming soon!")
@@ -143,12 +138,10 @@ def show_dashboard():
             # Show admin statistics if admin
             if current_user.role == "admin":
                 try:
-                    all_users = auth_service.user_manager.get_all_users()
-                    total_users = len(all_users)
-                    total_conversions = sum(user.conversion_count for user in all_users)
+                    stats = load_user_stats(auth_service)
                     
-                    st.metric("Total Users", total_users)
-                    st.metric("Total Conversions", total_conversions)
+                    st.metric("Total Users", stats["total_users"])
+                    st.metric("Total Conversions", stats["total_conversions"])
                     
                 except Exception as e:
                     st.error(f"Error loading statistics: {e}")
@@ -4,13 +4,13 @@ Handles user authentication through Redmine integration
 """
 
 import streamlit as st
-from ..auth.auth_service import AuthService
-from ..utils.helpers import show_error_message, show_success_message, show_info_message
+from ..auth.auth_service import get_auth_service
+from ..utils.helpers import show_error_message, show_success_message, show_info_message, navigate_to
 
 def show_login_page():
     """Display the login page with authentication form"""
     # Initialize auth service
-    auth_service = AuthService()
+    auth_service = get_auth_service()
     
     # Page header
     st.title("🔐 CV Converter - Login")
@@ -23,9 +23,7 @@ def show_login_page():
         
         col1, col2, col3 = st.columns([1, 1, 2])
         with col1:
-            if st.button("🏠 Go to Dashboard", type="primary"):
-                st.query_params.page = "dashboard"
-                st.rerun()
+            st.button("🏠 Go to Dashboard", type="primary", on_click=navigate_to, args=("dashboard",))
         with col2:
             if st.button("🔓 Logout"):
                 auth_service.logout()
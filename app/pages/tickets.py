@@ -3,26 +3,151 @@ Tickets interface page for CV Converter Web Application
 Handles ticket listing, search, filtering, and creation
 """
 
+from __future__ import annotations
+
+import hashlib
+import time
 import streamlit as st
+from collections import Counter
+from html import escape
 from datetime import datetime
-from ..auth.auth_service import AuthService
-from ..models.ticket import TicketManager, Ticket
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from ..auth.auth_service import AuthService, get_auth_service
 from ..utils.helpers import (
     show_success_message, show_error_message, show_warning_message, 
-    show_info_message, format_datetime
+    show_info_message, format_datetime, init_session_state_defaults, navigate_to
 )
 
+if TYPE_CHECKING:
+    from ..models.ticket import TicketManager, Ticket
+
+# Session state defaults for the ticket list
+_TICKETS_DEFAULTS = {
+    "tickets_page": 1,
+    "tickets_search": "",
+    "tickets_filter": "this_week",
+    "tickets_status": "open",
+    "tickets_type": "all"
+}
+
+# Filter selector options, display labels and option -> index lookups
+_TYPE_OPTS = ("all", "positions", "candidates")
+_TYPE_LABELS = {"all": "All Types", "positions": "💼 Positions", "candidates": "👤 Candidates"}
+_TYPE_IDX = {value: i for i, value in enumerate(_TYPE_OPTS)}
+
+_DATE_OPTS = ("this_week", "last_week", "this_month", "last_month", "all")
+_DATE_LABELS = {
+    "this_week": "This Week",
+    "last_week": "Last Week",
+    "this_month": "This Month",
+    "last_month": "Last Month",
+    "all": "All Time"
+}
+_DATE_IDX = {value: i for i, value in enumerate(_DATE_OPTS)}
+
+_STATUS_OPTS = ("open", "closed", "all")
+_STATUS_LABELS = {value: value.title() for value in _STATUS_OPTS}
+_STATUS_IDX = {value: i for i, value in enumerate(_STATUS_OPTS)}
+
+# Tickets fetched in one request (Redmine's maximum page size); pages inside
+# this window are sliced locally instead of requested one by one
+TICKET_WINDOW_SIZE = 100
+TICKET_WINDOW_TTL_SECONDS = 60  # Same bounded staleness as the memoized fetches
+
+class _TicketFetchError(Exception):
+    """Raised from the memoized fetch so st.cache_data never stores a failure"""
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_get_tickets(username: str, status: str, date_filter: str, search: str,
+                        page: int, api_key_digest: str, per_page: Optional[int] = None,
+                        _user_api_key: str = "") -> Tuple[List[Ticket], int]:
+    """
+    Fetch a page of tickets, memoized per user, credentials and filter combination
+    
+    The personal API key itself is excluded from the cache key (underscore
+    argument); api_key_digest stands in for it, empty for the system key.
+    Failures raise _TicketFetchError and are not memoized
+    """
+    from ..models.ticket import get_ticket_manager
+    
+    use_api_key = not _user_api_key
+    tickets, total, error = get_ticket_manager().get_tickets(
+        username=username,
+        user_api_key=_user_api_key,
+        assigned_to_me=True,
+        status_filter=status,
+        date_filter=date_filter,
+        search_query=search,
+        page=page,
+        use_api_key=use_api_key,
+        per_page=per_page
+    )
+    if error:
+        raise _TicketFetchError(error)
+    return tickets, total
+
+def _api_key_digest(user_api_key: Optional[str]) -> str:
+    """Fingerprint of a personal API key for cache keys, empty for the system key"""
+    if not user_api_key:
+        return ""
+    return hashlib.blake2b(user_api_key.encode(), digest_size=16).hexdigest()
+
+def _clear_ticket_caches():
+    """Drop memoized ticket fetches and this session's ticket window"""
+    _cached_get_tickets.clear()
+    st.session_state.pop("tix_cache", None)
+
+def _load_ticket_page(username: str, user_api_key: Optional[str],
+                      per_page: int) -> Tuple[List[Ticket], int, Optional[str]]:
+    """
+    Get the current ticket page, slicing it from the session's ticket window
+    
+    The window (first TICKET_WINDOW_SIZE matches) is refetched when the
+    filters or credentials change or it is older than TICKET_WINDOW_TTL_SECONDS;
+    pages beyond it fall back to a per-page request
+    """
+    state = st.session_state
+    key_digest = _api_key_digest(user_api_key)
+    key = (username, state.tickets_status, state.tickets_filter, state.tickets_search, key_digest)
+    
+    now = time.time()
+    cache = state.get("tix_cache")
+    try:
+        if (cache is None or cache["key"] != key
+                or now - cache["fetched_at"] > TICKET_WINDOW_TTL_SECONDS):
+            rows, total = _cached_get_tickets(
+                *key[:4], 1, key_digest, TICKET_WINDOW_SIZE, _user_api_key=user_api_key or ""
+            )
+            cache = {"key": key, "rows": rows, "total": total, "fetched_at": now}
+            state.tix_cache = cache
+        
+        rows = cache["rows"]
+        start = (state.tickets_page - 1) * per_page
+        end = start + per_page
+        if end <= len(rows) or len(rows) < TICKET_WINDOW_SIZE:
+            return rows[start:end], cache["total"], None
+        
+        rows, total = _cached_get_tickets(
+            *key[:4], state.tickets_page, key_digest, _user_api_key=user_api_key or ""
+        )
+        return rows, total, None
+    except _TicketFetchError as e:
+        return [], 0, str(e)
+
 def show_tickets_page():
     """Display the tickets interface page"""
+    # Ticket models are only imported once the page is actually opened
+    from ..models.ticket import get_ticket_manager
+    
     # Initialize auth service and require authentication
-    auth_service = AuthService()
+    auth_service = get_auth_service()
     auth_service.require_authentication()
     
     # Get current user
     current_user = auth_service.get_current_user()
     
     # Initialize ticket manager
-    ticket_manager = TicketManager()
+    ticket_manager = get_ticket_manager()
     
     # Page header
     st.title("🎫 Redmine Tickets")
@@ -33,22 +158,14 @@ def show_tickets_page():
     with st.sidebar:
         st.markdown("### 🧭 Navigation")
         
-        if st.button("🏠 Dashboard", use_container_width=True):
-            st.query_params.page = "dashboard"
-            st.rerun()
+        st.button("🏠 Dashboard", use_container_width=True, on_click=navigate_to, args=("dashboard",))
         
-        if st.button("🔄 CV Converter", use_container_width=True):
-            st.query_params.page = "converter"
-            st.rerun()
+        st.button("🔄 CV Converter", use_container_width=True, on_click=navigate_to, args=("converter",))
         
         if current_user.role == "admin":
-            if st.button("👥 User Management", use_container_width=True):
-                st.query_params.page = "admin_users"
-                st.rerun()
+            st.button("👥 User Management", use_container_width=True, on_click=navigate_to, args=("admin_users",))
             
-            if st.button("⚙️ Settings", use_container_width=True):
-                st.query_params.page = "admin_settings"
-                st.rerun()
+            st.button("⚙️ Settings", use_container_width=True, on_click=navigate_to, args=("admin_settings",))
         
         st.markdown("---")
         
@@ -58,14 +175,7 @@ def show_tickets_page():
             st.rerun()
     
     # Initialize session state for tickets
-    if "tickets_page" not in st.session_state:
-        st.session_state.tickets_page = 1
-    if "tickets_search" not in st.session_state:
-        st.session_state.tickets_search = ""
-    if "tickets_filter" not in st.session_state:
-        st.session_state.tickets_filter = "this_week"
-    if "tickets_status" not in st.session_state:
-        st.session_state.tickets_status = "open"
+    init_session_state_defaults(_TICKETS_DEFAULTS)
     
     # Main content tabs
     tab1, tab2 = st.tabs(["📋 Ticket List", "➕ New Ticket"])
@@ -101,82 +211,76 @@ def show_ticket_list(auth_service: AuthService, ticket_manager: TicketManager, c
             - Full CV operations available
             """)
     
-    # Filters row
-    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
-    
-    with col1:
-        search_query = st.text_input(
-            "🔍 Search tickets",
-            value=st.session_state.tickets_search,
-            placeholder="Search by ID, subject, or description...",
-            key="search_input"
-        )
-        if search_query != st.session_state.tickets_search:
-            st.session_state.tickets_search = search_query
-            st.session_state.tickets_page = 1  # Reset to first page on search
-    
-    with col2:
-        # Initialize ticket type filter if not exists
-        if "tickets_type" not in st.session_state:
-            st.session_state.tickets_type = "all"
-        
-        type_filter = st.selectbox(
-            "🎯 Type",
-            options=["all", "positions", "candidates"],
-            format_func=lambda x: {
-                "all": "All Types",
-                "positions": "💼 Positions",
-                "candidates": "👤 Candidates"
-            }[x],
-            index=["all", "positions", "candidates"].index(st.session_state.tickets_type),
-            key="type_filter"
-        )
-        if type_filter != st.session_state.tickets_type:
-            st.session_state.tickets_type = type_filter
-            st.session_state.tickets_page = 1
-    
-    with col3:
-        date_filter = st.selectbox(
-            "📅 Date Range",
-            options=["this_week", "last_week", "this_month", "last_month", "all"],
-            format_func=lambda x: {
-                "this_week": "This Week",
-                "last_week": "Last Week", 
-                "this_month": "This Month",
-                "last_month": "Last Month",
-                "all": "All Time"
-            }[x],
-            index=["this_week", "last_week", "this_month", "last_month", "all"].index(st.session_state.tickets_filter),
-            key="date_filter"
-        )
-        if date_filter != st.session_state.tickets_filter:
-            st.session_state.tickets_filter = date_filter
-            st.session_state.tickets_page = 1
+    # Filters are applied together on submit, so typing does not trigger a fetch
+    filter_col, refresh_col = st.columns([5, 1])
     
-    with col4:
-        status_filter = st.selectbox(
-            "📊 Status",
-            options=["open", "closed", "all"],
-            format_func=lambda x: x.title(),
-            index=["open", "closed", "all"].index(st.session_state.tickets_status),
-            key="status_filter"
-        )
-        if status_filter != st.session_state.tickets_status:
-            st.session_state.tickets_status = status_filter
-            st.session_state.tickets_page = 1
+    with filter_col:
+        with st.form("ticket_filters", border=False):
+            col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+            
+            with col1:
+                search_query = st.text_input(
+                    "🔍 Search tickets",
+                    value=st.session_state.tickets_search,
+                    placeholder="Search by ID, subject, or description...",
+                    key="search_input"
+                )
+            
+            with col2:
+                type_filter = st.selectbox(
+                    "🎯 Type",
+                    options=_TYPE_OPTS,
+                    format_func=_TYPE_LABELS.__getitem__,
+                    index=_TYPE_IDX[st.session_state.tickets_type],
+                    key="type_filter"
+                )
+            
+            with col3:
+                date_filter = st.selectbox(
+                    "📅 Date Range",
+                    options=_DATE_OPTS,
+                    format_func=_DATE_LABELS.__getitem__,
+                    index=_DATE_IDX[st.session_state.tickets_filter],
+                    key="date_filter"
+                )
+            
+            with col4:
+                status_filter = st.selectbox(
+                    "📊 Status",
+                    options=_STATUS_OPTS,
+                    format_func=_STATUS_LABELS.__getitem__,
+                    index=_STATUS_IDX[st.session_state.tickets_status],
+                    key="status_filter"
+                )
+            
+            submitted = st.form_submit_button("✅ Apply filters")
+        
+        if submitted:
+            new_filters = (search_query, type_filter, date_filter, status_filter)
+            current_filters = (
+                st.session_state.tickets_search,
+                st.session_state.tickets_type,
+                st.session_state.tickets_filter,
+                st.session_state.tickets_status
+            )
+            if new_filters != current_filters:
+                (st.session_state.tickets_search, st.session_state.tickets_type,
+                 st.session_state.tickets_filter, st.session_state.tickets_status) = new_filters
+                st.session_state.tickets_page = 1  # Reset to first page on filter change
     
-    with col5:
+    with refresh_col:
         if st.button("🔄 Refresh", use_container_width=True):
+            _clear_ticket_caches()
             st.rerun()
     
     # Add credential status and options
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        # Check if we have session credentials
-        credentials = auth_service.get_user_credentials()
-        if credentials:
-            st.success("🔐 Session credentials available - using your personal Redmine access")
+        # Check if we have a personal API key in session
+        user_api_key = auth_service.get_user_api_key()
+        if user_api_key:
+            st.success("🔐 Personal API key available - using your personal Redmine access")
         else:
             st.warning("🔑 Using system API key - may show limited tickets")
     
@@ -188,35 +292,34 @@ def show_ticket_list(auth_service: AuthService, ticket_manager: TicketManager, c
     if st.session_state.get("show_credential_form", False):
         show_credential_form(auth_service)
     
+    _ticket_results_fragment(ticket_manager, current_user)
+
+@st.fragment
+def _ticket_results_fragment(ticket_manager: TicketManager, current_user):
+    """
+    Render the fetched ticket page, type breakdown, cards and pagination
+    
+    Runs as a fragment so page changes rerun only this section, not the
+    sidebar, filters or the new ticket form
+    """
+    # Prefer the personal API key, fallback to system API key; read on every
+    # fragment run so a cleared key takes effect immediately
+    user_api_key = get_auth_service().get_user_api_key()
+    
     # Load tickets with loading spinner
     with st.spinner("🔍 Loading tickets..."):
-        # Get credentials - try session first, fallback to API key
-        credentials = auth_service.get_user_credentials()
-        
-        if credentials:
-            # Use stored session credentials
-            username, password = credentials
-            use_api_key = False
-            st.info("🔐 Using session credentials for Redmine access")
-        else:
-            # Use API key method
-            username = current_user.username
-            password = ""
-            use_api_key = True
+        if not user_api_key:
             st.info("🔑 Using API key for Redmine access")
+        else:
+            st.info("🔐 Using personal API key for Redmine access")
         
-        tickets, total_count, error = ticket_manager.get_tickets(
-            username=username,
-            password=password,
-            assigned_to_me=True,
-            status_filter=st.session_state.tickets_status,
-            date_filter=st.session_state.tickets_filter,
-            search_query=st.session_state.tickets_search,
-            page=st.session_state.tickets_page,
-            use_api_key=use_api_key
+        tickets, total_count, error = _load_ticket_page(
+            current_user.username, user_api_key, ticket_manager.tickets_per_page
         )
 
     if error:
+        # Refetch this session's window next time; failed fetches are never memoized
+        st.session_state.pop("tix_cache", None)
         show_error_message(f"Failed to load tickets: {error}")
         st.markdown("**Possible solutions:**")
         st.markdown("- Check your Redmine credentials")
@@ -244,8 +347,9 @@ def show_ticket_list(auth_service: AuthService, ticket_manager: TicketManager, c
         # Show type distribution
         if st.session_state.tickets_type == "all":
             all_tickets = tickets  # Before filtering was applied
-            position_count = len([t for t in all_tickets if t.tracker_name.lower() == "general task"])
-            candidate_count = len([t for t in all_tickets if t.tracker_name.lower() == "person"])
+            tracker_counts = Counter(t.tracker_name.lower() for t in all_tickets)
+            position_count = tracker_counts["general task"]
+            candidate_count = tracker_counts["person"]
             other_count = len(all_tickets) - position_count - candidate_count
             
             col1, col2, col3 = st.columns(3)
@@ -263,121 +367,115 @@ def show_ticket_list(auth_service: AuthService, ticket_manager: TicketManager, c
     if total_count > ticket_manager.tickets_per_page:
         show_pagination_controls(total_count, ticket_manager.tickets_per_page, "top")
     
-    # Tickets display
-    for ticket in tickets:
-        display_ticket_card(ticket)
+    # Tickets display: one table with a detail card for the selected row, or one card per ticket
+    if st.toggle("Compact view", key="tickets_compact_view"):
+        # The key follows the page and filters so a row selection never carries over to other results
+        state = st.session_state
+        table_key = (f"tickets_table_{state.tickets_page}_{state.tickets_status}_{state.tickets_filter}"
+                     f"_{state.tickets_type}_{state.tickets_search}")
+        selected = show_ticket_table(tickets, key=table_key)
+        if selected is not None:
+            st.session_state.selected_ticket = selected.id
+            display_ticket_card(selected)
+    else:
+        for ticket in tickets:
+            display_ticket_card(ticket)
     
     # Pagination controls (bottom)
     if total_count > ticket_manager.tickets_per_page:
         show_pagination_controls(total_count, ticket_manager.tickets_per_page, "bottom")
 
+# Timestamps are sent as datetime columns and formatted by the frontend
+_TICKET_TABLE_COLUMNS = {
+    "Created": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+    "Updated": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm")
+}
+
+def show_ticket_table(tickets: List[Ticket], key: str) -> Optional[Ticket]:
+    """Display tickets as a single selectable table; returns the selected ticket"""
+    rows = [
+        {
+            "ID": ticket.id,
+            "Subject": ticket.subject,
+            "Type": ticket.tracker_name,
+            "Status": ticket.status_name,
+            "Priority": ticket.priority_name,
+            "Author": ticket.author_name,
+            "Created": ticket.created_on,
+            "Updated": ticket.updated_on
+        }
+        for ticket in tickets
+    ]
+    event = st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config=_TICKET_TABLE_COLUMNS,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=key
+    )
+    selected_rows = event.selection.rows
+    if selected_rows and 0 <= selected_rows[0] < len(tickets):
+        return tickets[selected_rows[0]]
+    return None
+
+# Card styling per ticket type: (background, accent color, icon, type label)
+_POSITION_CARD_STYLE = ("linear-gradient(135deg, #f0f8ff 0%, #e6f3ff 100%)", "#4a90e2", "💼", "Position")
+_CANDIDATE_CARD_STYLE = ("linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%)", "#28a745", "👤", "Candidate")
+_DEFAULT_CARD_STYLE = ("#ffffff", "#6c757d", "📋", "")
+_TRACKER_CARD_STYLES = {"general task": _POSITION_CARD_STYLE, "person": _CANDIDATE_CARD_STYLE}
+
+# Lowercased status/priority name -> icon lookups
+_STATUS_ICON = {"new": "🟢", "open": "🟢"}.get
+_PRIORITY_ICON = {"high": "🔥"}.get
+
 def display_ticket_card(ticket: Ticket):
     """Display a single ticket card with different styling for positions vs candidates"""
     
-    # Determine ticket type based on tracker
-    is_position = ticket.tracker_name.lower() == "general task"
-    is_candidate = ticket.tracker_name.lower() == "person"
-    
-    # Set styling based on ticket type
-    if is_position:
-        # Position tickets - highlighted background
-        card_style = """
-        <div style="
-            background: linear-gradient(135deg, #f0f8ff 0%, #e6f3ff 100%);
-            border-left: 5px solid #4a90e2;
-            padding: 1rem;
-            border-radius: 8px;
-            margin: 0.5rem 0;
-            box-shadow: 0 2px 4px rgba(74, 144, 226, 0.1);
-        ">
-        """
-        ticket_icon = "💼"
-        ticket_type_label = "Position"
-        card_color = "#4a90e2"
-    elif is_candidate:
-        # Candidate tickets - subtle background
-        card_style = """
-        <div style="
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border-left: 5px solid #28a745;
-            padding: 1rem;
-            border-radius: 8px;
-            margin: 0.5rem 0;
-            box-shadow: 0 2px 4px rgba(40, 167, 69, 0.1);
-        ">
-        """
-        ticket_icon = "👤"
-        ticket_type_label = "Candidate"
-        card_color = "#28a745"
+    # Set styling based on ticket type (tracker)
+    style = _TRACKER_CARD_STYLES.get(ticket.tracker_name.lower())
+    if style:
+        background, card_color, ticket_icon, ticket_type_label = style
     else:
-        # Other ticket types - default styling
-        card_style = """
-        <div style="
-            background: #ffffff;
-            border-left: 5px solid #6c757d;
-            padding: 1rem;
-            border-radius: 8px;
-            margin: 0.5rem 0;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-        ">
-        """
-        ticket_icon = "📋"
+        background, card_color, ticket_icon, _ = _DEFAULT_CARD_STYLE
         ticket_type_label = ticket.tracker_name
-        card_color = "#6c757d"
     
-    # Display the styled card
-    st.markdown(card_style, unsafe_allow_html=True)
+    status_color = _STATUS_ICON(ticket.status_name.lower(), "🔴")
+    priority_icon = _PRIORITY_ICON(ticket.priority_name.lower(), "📝")
+    assigned_line = (
+        f"<b>Assigned:</b> {escape(ticket.assigned_to_name)}<br>" if ticket.assigned_to_name else ""
+    )
+    
+    # Header and details are sent to the frontend as one markdown element
+    st.markdown(f"""
+<div style="background: {background}; border-left: 5px solid {card_color}; padding: 1rem;
+            border-radius: 8px; margin: 0.5rem 0; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);">
+  <div style="display: flex; align-items: center; gap: 1rem; flex-wrap: wrap;">
+    <h3 style="margin: 0; flex: 3;">{ticket_icon} #{ticket.id}: {escape(ticket.subject)}</h3>
+    <span style="background-color: {card_color}; color: white; padding: 0.25rem 0.5rem;
+                 border-radius: 12px; font-size: 0.8rem; font-weight: bold;">{escape(ticket_type_label)}</span>
+    <span><b>Status:</b> {status_color} {escape(ticket.status_name)}</span>
+    <span><b>Priority:</b> {priority_icon} {escape(ticket.priority_name)}</span>
+  </div>
+  <div style="margin-top: 0.5rem;">
+    <b>Author:</b> {escape(ticket.author_name)}<br>
+    {assigned_line}<b>Tracker:</b> {escape(ticket.tracker_name)}<br>
+    <b>Created:</b> {ticket.created_on}<br>
+    <b>Updated:</b> {ticket.updated_on}
+  </div>
+</div>
+""", unsafe_allow_html=True)
     
     with st.container():
-        # Ticket header with type indicator
-        col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-        
-        with col1:
-            st.markdown(f"### {ticket_icon} #{ticket.id}: {ticket.subject}")
-        
-        with col2:
-            st.markdown(f"""
-            <div style="
-                background-color: {card_color};
-                color: white;
-                padding: 0.25rem 0.5rem;
-                border-radius: 12px;
-                text-align: center;
-                font-size: 0.8rem;
-                font-weight: bold;
-            ">
-                {ticket_type_label}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            status_color = "🟢" if ticket.status_name.lower() in ["new", "open"] else "🔴"
-            st.markdown(f"**Status:** {status_color} {ticket.status_name}")
-        
-        with col4:
-            priority_icon = "🔥" if ticket.priority_name.lower() == "high" else "📝"
-            st.markdown(f"**Priority:** {priority_icon} {ticket.priority_name}")
-        
-        # Ticket details
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            if ticket.description:
-                with st.expander("📄 Description"):
-                    st.write(ticket.description)
-            else:
-                st.caption("*No description*")
-        
-        with col2:
-            st.write(f"**Author:** {ticket.author_name}")
-            if ticket.assigned_to_name:
-                st.write(f"**Assigned:** {ticket.assigned_to_name}")
-            st.write(f"**Tracker:** {ticket.tracker_name}")
-            st.write(f"**Created:** {ticket.created_on}")
-            st.write(f"**Updated:** {ticket.updated_on}")
+        if ticket.description:
+            with st.expander("📄 Description"):
+                st.write(ticket.description)
+        else:
+            st.caption("*No description*")
         
         # Action buttons - conditional based on ticket type
-        if is_position:
+        if style is _POSITION_CARD_STYLE:
             # Position tickets - limited actions
             col1, col2, col3 = st.columns([1, 1, 2])
             
@@ -394,7 +492,7 @@ def display_ticket_card(ticket: Ticket):
             with col3:
                 st.info("💼 Position ticket - CV operations not available")
         
-        elif is_candidate:
+        elif style is _CANDIDATE_CARD_STYLE:
             # Candidate tickets - full actions available
             col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
             
@@ -439,10 +537,12 @@ def display_ticket_card(ticket: Ticket):
                     st.query_params.ticket_id = str(ticket.id)
                     st.rerun()
     
-    # Close the styled div
-    st.markdown("</div>", unsafe_allow_html=True)
     st.divider()
 
+def _set_ticket_page(page: int):
+    """Jump the ticket list to page (button callback, runs before the rerun)"""
+    st.session_state.tickets_page = page
+
 def show_pagination_controls(total_count: int, per_page: int, position: str):
     """Display pagination controls"""
     total_pages = (total_count + per_page - 1) // per_page
@@ -451,28 +551,24 @@ def show_pagination_controls(total_count: int, per_page: int, position: str):
     col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
     
     with col1:
-        if st.button("⏮️ First", key=f"first_{position}", disabled=current_page <= 1):
-            st.session_state.tickets_page = 1
-            st.rerun()
+        st.button("⏮️ First", key=f"first_{position}", disabled=current_page <= 1,
+                  on_click=_set_ticket_page, args=(1,))
     
     with col2:
-        if st.button("⏪ Prev", key=f"prev_{position}", disabled=current_page <= 1):
-            st.session_state.tickets_page = max(1, current_page - 1)
-            st.rerun()
+        st.button("⏪ Prev", key=f"prev_{position}", disabled=current_page <= 1,
+                  on_click=_set_ticket_page, args=(max(1, current_page - 1),))
     
     with col3:
         st.markdown(f"<div style='text-align: center; padding: 0.5rem;'>Page {current_page} of {total_pages}</div>", 
                    unsafe_allow_html=True)
     
     with col4:
-        if st.button("Next ⏩", key=f"next_{position}", disabled=current_page >= total_pages):
-            st.session_state.tickets_page = min(total_pages, current_page + 1)
-            st.rerun()
+        st.button("Next ⏩", key=f"next_{position}", disabled=current_page >= total_pages,
+                  on_click=_set_ticket_page, args=(min(total_pages, current_page + 1),))
     
     with col5:
-        if st.button("Last ⏭️", key=f"last_{position}", disabled=current_page >= total_pages):
-            st.session_state.tickets_page = total_pages
-            st.rerun()
+        st.button("Last ⏭️", key=f"last_{position}", disabled=current_page >= total_pages,
+                  on_click=_set_ticket_page, args=(total_pages,))
 
 def show_new_ticket_form(auth_service: AuthService, ticket_manager: TicketManager, current_user):
     """Display the new ticket creation form"""
@@ -561,30 +657,20 @@ def show_new_ticket_form(auth_service: AuthService, ticket_manager: TicketManage
         
         # Create ticket
         with st.spinner("🎫 Creating ticket..."):
-            # Get credentials - try session first, fallback to API key
-            credentials = auth_service.get_user_credentials()
-            
-            if credentials:
-                # Use stored session credentials
-                username, password = credentials
-                use_api_key = False
-            else:
-                # Use API key method
-                username = current_user.username
-                password = ""
-                use_api_key = True
+            # Prefer the personal API key, fallback to system API key
+            user_api_key = auth_service.get_user_api_key()
             
             ticket, error = ticket_manager.create_ticket(
                 subject=subject,
                 description=full_description,
                 candidate_name=candidate_name,
                 stack=stack,
-                username=username,
-                password=password,
-                use_api_key=use_api_key
+                user_api_key=user_api_key or "",
+                use_api_key=not user_api_key
             )
         
         if ticket:
+            _clear_ticket_caches()
             show_success_message(f"Ticket #{ticket.id} created successfully!")
             st.balloons()
             # Clear form by rerunning
@@ -598,7 +684,7 @@ def show_new_ticket_form(auth_service: AuthService, ticket_manager: TicketManage
 def show_credential_form(auth_service: AuthService):
     """Display form for entering Redmine credentials"""
     st.markdown("### 🔐 Enter Redmine Credentials")
-    st.info("Enter your Redmine credentials to access tickets with your personal permissions. Credentials are stored temporarily in your session only.")
+    st.info("Enter your Redmine credentials to access tickets with your personal permissions. Only your Redmine API key is kept in your session; the password is not stored.")
     
     with st.form("redmine_credentials"):
         col1, col2 = st.columns(2)
@@ -614,7 +700,7 @@ def show_credential_form(auth_service: AuthService):
             password = st.text_input(
                 "🔒 Redmine Password", 
                 type="password",
-                help="Your Redmine password (stored in session only)"
+                help="Your Redmine password (used once, not stored)"
             )
         
         col1, col2, col3 = st.columns([1, 1, 2])
@@ -633,14 +719,18 @@ def show_credential_form(auth_service: AuthService):
             show_error_message("Both username and password are required")
             return
         
-        # Store credentials in session
-        auth_service.store_user_credentials(username, password)
+        # Exchange credentials for personal API key
+        success, error = auth_service.connect_redmine_account(username, password)
+        if not success:
+            show_error_message(error)
+            return
+        
         st.session_state.show_credential_form = False
         show_success_message("Credentials saved for this session!")
         st.rerun()
     
     if clear:
-        auth_service.clear_user_credentials()
+        auth_service.clear_user_api_key()
         st.session_state.show_credential_form = False
         show_success_message("Credentials cleared!")
         st.rerun()
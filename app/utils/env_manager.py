@@ -4,12 +4,50 @@ Handles .env file operations with validation and hot-reload capability
 """
 
 import os
+import re
+import shutil
 import stat
+import tempfile
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 from dotenv import load_dotenv, set_key, unset_key
 import streamlit as st
 
+# Matches "KEY=..." / "export KEY=..." lines, capturing the key
+_ENV_LINE_RE = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=")
+
+def _validate_int(var_name: str, value: Any) -> Tuple[bool, Optional[str]]:
+    """Accept positive integers"""
+    try:
+        int_value = int(value)
+    except ValueError:
+        return False, f"{var_name} must be a valid integer"
+    if int_value <= 0:
+        return False, f"{var_name} must be a positive integer"
+    return True, None
+
+def _validate_url(var_name: str, value: Any) -> Tuple[bool, Optional[str]]:
+    """Accept http(s) URLs"""
+    if not value or not value.startswith(('http://', 'https://')):
+        return False, f"{var_name} must be a valid URL starting with http:// or https://"
+    return True, None
+
+def _validate_path(var_name: str, value: Any) -> Tuple[bool, Optional[str]]:
+    """Accept any non-blank path (basic format check)"""
+    if not value or len(value.strip()) == 0:
+        return False, f"{var_name} cannot be empty"
+    return True, None
+
+# Configurable variable type -> value validator
+_VALIDATORS = {
+    "int": _validate_int,
+    "url": _validate_url,
+    "path": _validate_path
+}
+
+# .env path -> mtime_ns of the file when it was last loaded into os.environ
+_loaded_mtimes: Dict[str, int] = {}
+
 class EnvManager:
     """Manages environment variables with hot-reload and validation"""
     
@@ -18,6 +56,10 @@ class EnvManager:
         self.env_file_path = env_file_path
         self.env_file = Path(env_file_path)
         
+        # Last permission check result and the file stat it was made against
+        self._perm_cache: Optional[Tuple[bool, Optional[str]]] = None
+        self._perm_cache_stat: Optional[Tuple[int, int, int]] = None
+        
         # Configurable settings (visible in admin interface)
         self.configurable_vars = {
             "DEFAULT_PROJECT_ID": {
@@ -57,9 +99,33 @@ class EnvManager:
         """
         Validate that we can read and write to the .env file
         
+        The result is reused until the file's stat (mtime, inode, size)
+        changes
+        
         Returns:
             Tuple of (can_write, error_message)
         """
+        stat_key = self._file_stat_key()
+        if stat_key is not None and stat_key == self._perm_cache_stat:
+            return self._perm_cache
+        
+        result = self._check_file_permissions()
+        if result[0]:
+            # Key on the stat after the check, which may have created the file
+            self._perm_cache = result
+            self._perm_cache_stat = self._file_stat_key()
+        return result
+    
+    def _file_stat_key(self) -> Optional[Tuple[int, int, int]]:
+        """Stat fingerprint of the .env file, None if it cannot be stat'ed"""
+        try:
+            file_stat = self.env_file.stat()
+        except OSError:
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_ino, file_stat.st_size
+    
+    def _check_file_permissions(self) -> Tuple[bool, Optional[str]]:
+        """Run the uncached read/write checks against the .env file"""
         try:
             # Check if file exists
             if not self.env_file.exists():
@@ -74,28 +140,11 @@ class EnvManager:
             if not os.access(self.env_file_path, os.R_OK):
                 return False, "No read permission for .env file"
             
-            # Check write permissions
+            # Check write permissions; real write failures surface from set_key
             if not os.access(self.env_file_path, os.W_OK):
                 return False, "No write permission for .env file"
             
-            # Test actual write by appending and removing a comment
-            try:
-                with open(self.env_file_path, 'a') as f:
-                    f.write("\n# Test write - will be removed\n")
-                
-                # Remove the test line
-                with open(self.env_file_path, 'r') as f:
-                    lines = f.readlines()
-                
-                with open(self.env_file_path, 'w') as f:
-                    for line in lines:
-                        if not line.strip().startswith("# Test write"):
-                            f.write(line)
-                
-                return True, None
-                
-            except Exception as e:
-                return False, f"Cannot write to .env file: {e}"
+            return True, None
                 
         except Exception as e:
             return False, f"Error validating file permissions: {e}"
@@ -139,25 +188,9 @@ class EnvManager:
         
         var_config = self.configurable_vars[var_name]
         
-        # Type validation
-        if var_config["type"] == "int":
-            try:
-                int_value = int(value)
-                if int_value <= 0:
-                    return False, f"{var_name} must be a positive integer"
-            except ValueError:
-                return False, f"{var_name} must be a valid integer"
-        
-        elif var_config["type"] == "url":
-            if not value or not value.startswith(('http://', 'https://')):
-                return False, f"{var_name} must be a valid URL starting with http:// or https://"
-        
-        elif var_config["type"] == "path":
-            # Validate path format (basic check)
-            if not value or len(value.strip()) == 0:
-                return False, f"{var_name} cannot be empty"
-        
-        return True, None
+        # Type validation; types without a validator are accepted as-is
+        validator = _VALIDATORS.get(var_config["type"])
+        return validator(var_name, value) if validator else (True, None)
     
     def update_env_var(self, var_name: str, value: str) -> Tuple[bool, Optional[str]]:
         """
@@ -184,18 +217,57 @@ class EnvManager:
             # Update the .env file
             set_key(self.env_file_path, var_name, str(value))
             
+            # A successful write proves writability for the file's new stat
+            self._perm_cache = (True, None)
+            self._perm_cache_stat = self._file_stat_key()
+            
             # Hot-reload the environment variable
             os.environ[var_name] = str(value)
             
             return True, None
             
+        except PermissionError as e:
+            return False, f"Cannot write to .env file: {e}"
         except Exception as e:
             return False, f"Error updating {var_name}: {e}"
     
+    def update_env_vars(self, updates: Dict[str, str]) -> Tuple[bool, Optional[str]]:
+        """
+        Update several environment variables with a single .env rewrite
+        
+        Args:
+            updates: Variable name -> new value
+            
+        Returns:
+            Tuple of (success, error_message)
+        """
+        for var_name, value in updates.items():
+            is_valid, validation_error = self.validate_value(var_name, value)
+            if not is_valid:
+                return False, validation_error
+        
+        try:
+            return self._bulk_update(updates)
+        except Exception as e:
+            return False, f"Error updating settings: {e}"
+    
     def reload_env(self):
-        """Hot-reload environment variables from .env file"""
+        """Hot-reload environment variables from .env file, skipped if unchanged since the last load"""
+        try:
+            mtime_ns = self.env_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            st.error(f"Error reloading environment: {e}")
+            return
+        
+        path_key = str(self.env_file.absolute())
+        if _loaded_mtimes.get(path_key) == mtime_ns:
+            return
+        
         try:
             load_dotenv(self.env_file_path, override=True)
+            _loaded_mtimes[path_key] = mtime_ns
         except Exception as e:
             st.error(f"Error reloading environment: {e}")
     
@@ -250,6 +322,33 @@ class EnvManager:
         """
         Reset all configurable variables to their default values
         
+        Returns:
+            Tuple of (success, error_message)
+        """
+        # Validate every default before touching the file
+        updates = {}
+        for var_name, var_config in self.configurable_vars.items():
+            is_valid, validation_error = self.validate_value(var_name, var_config["default"])
+            if not is_valid:
+                return False, f"Error resetting {var_name}: {validation_error}"
+            updates[var_name] = var_config["default"]
+        
+        try:
+            return self._bulk_update(updates)
+        except Exception as e:
+            return False, f"Error resetting to defaults: {e}"
+    
+    def _bulk_update(self, updates: Dict[str, str]) -> Tuple[bool, Optional[str]]:
+        """
+        Write several variables to the .env file in a single rewrite
+        
+        Existing lines for the keys are replaced in place (comments and other
+        lines are kept), missing keys are appended. Values are quoted the
+        same way as dotenv's set_key.
+        
+        Args:
+            updates: Variable name -> new value
+            
         Returns:
             Tuple of (success, error_message)
         """
@@ -257,13 +356,56 @@ class EnvManager:
         if not can_write:
             return False, error
         
+        with open(self.env_file_path, 'r') as f:
+            lines = f.readlines()
+        
+        pending = {name: str(value) for name, value in updates.items()}
+        rendered = {name: "{}='{}'\n".format(name, value.replace("'", "\\'"))
+                    for name, value in pending.items()}
+        
+        out_lines = []
+        for line in lines:
+            match = _ENV_LINE_RE.match(line)
+            if match and match.group(1) in rendered:
+                name = match.group(1)
+                if name in pending:
+                    out_lines.append(rendered[name])
+                    del pending[name]
+                # Drop duplicate definitions of an updated key
+                continue
+            out_lines.append(line)
+        
+        if pending:
+            if out_lines and not out_lines[-1].endswith("\n"):
+                out_lines[-1] += "\n"
+            out_lines.extend(rendered[name] for name in pending)
+        
+        # Write a sibling temp file and swap it in, so readers never see a partial .env
+        fd, tmp_path = tempfile.mkstemp(dir=self.env_file.absolute().parent,
+                                        prefix=".env.", suffix=".tmp")
         try:
-            for var_name, var_config in self.configurable_vars.items():
-                success, error = self.update_env_var(var_name, var_config["default"])
-                if not success:
-                    return False, f"Error resetting {var_name}: {error}"
-            
-            return True, None
-            
-        except Exception as e:
-            return False, f"Error resetting to defaults: {e}" 
\ No newline at end of file
+            with os.fdopen(fd, 'w') as f:
+                f.writelines(out_lines)
+            shutil.copymode(self.env_file_path, tmp_path)
+            os.replace(tmp_path, self.env_file_path)
+        except BaseException as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            if isinstance(e, PermissionError):
+                return False, f"Cannot write to .env file: {e}"
+            raise
+        
+        # Hot-reload the updated variables
+        for name, value in updates.items():
+            os.environ[name] = str(value)
+        
+        self._perm_cache = (True, None)
+        self._perm_cache_stat = self._file_stat_key()
+        return True, None
+
+@st.cache_resource
+def get_env_manager(env_file_path: str = ".env") -> EnvManager:
+    """Get the shared EnvManager instance for env_file_path"""
+    return EnvManager(env_file_path)
@@ -3,9 +3,11 @@ Utility functions and helpers for the CV Converter Web Application
 """
 
 import streamlit as st
-from typing import Any, Optional, Dict, List
+from typing import Any, Optional, Dict, Iterable, List
 from datetime import datetime, timedelta
+from functools import lru_cache
 import os
+import re
 from pathlib import Path
 
 def show_success_message(message: str):
@@ -24,12 +26,19 @@ def show_info_message(message: str):
     """Display info message with consistent styling"""
     st.info(f"ℹ️ {message}")
 
-def format_datetime(dt: Optional[datetime]) -> str:
+@lru_cache(maxsize=4096)
+def _format_absolute(dt: datetime) -> str:
+    """Memoized absolute timestamp for datetimes older than a week"""
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+def format_datetime(dt: Optional[datetime], now: Optional[datetime] = None) -> str:
     """
     Format datetime for display
     
     Args:
         dt: Datetime object to format
+        now: Reference time for relative labels; callers formatting several
+            values in one render can pass a shared value (defaults to now)
         
     Returns:
         Formatted datetime string
@@ -37,8 +46,7 @@ def format_datetime(dt: Optional[datetime]) -> str:
     if not dt:
         return "Never"
     
-    now = datetime.now()
-    diff = now - dt
+    diff = (now or datetime.now()) - dt
     
     if diff.days == 0:
         if diff.seconds < 3600:  # Less than 1 hour
@@ -52,15 +60,16 @@ def format_datetime(dt: Optional[datetime]) -> str:
     elif diff.days < 7:
         return f"{diff.days} day{'s' if diff.days != 1 else ''} ago"
     else:
-        return dt.strftime("%Y-%m-%d %H:%M")
+        return _format_absolute(dt)
 
-def validate_file_upload(uploaded_file, allowed_extensions: List[str], max_size_mb: int = 10) -> tuple[bool, Optional[str]]:
+def validate_file_upload(uploaded_file, allowed_extensions: Iterable[str], max_size_mb: int = 10) -> tuple[bool, Optional[str]]:
     """
     Validate uploaded file
     
     Args:
         uploaded_file: Streamlit uploaded file object
-        allowed_extensions: List of allowed file extensions (without dots)
+        allowed_extensions: Allowed file extensions (without dots); a frozenset
+            is used as-is and must already be lowercase
         max_size_mb: Maximum file size in MB
         
     Returns:
@@ -70,9 +79,11 @@ def validate_file_upload(uploaded_file, allowed_extensions: List[str], max_size_
         return False, "No file uploaded"
     
     # Check file extension
-    file_extension = uploaded_file.name.split('.')[-1].lower()
-    if file_extension not in [ext.lower() for ext in allowed_extensions]:
-        return False, f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
+    allowed = (allowed_extensions if isinstance(allowed_extensions, frozenset)
+               else frozenset(ext.lower() for ext in allowed_extensions))
+    file_extension = uploaded_file.name.rpartition('.')[2].lower()
+    if file_extension not in allowed:
+        return False, f"File type not allowed. Allowed types: {', '.join(sorted(allowed))}"
     
     # Check file size
     file_size_mb = uploaded_file.size / (1024 * 1024)  # Convert bytes to MB
@@ -90,6 +101,9 @@ def ensure_directory_exists(directory_path: str):
     """
     Path(directory_path).mkdir(parents=True, exist_ok=True)
 
+# Characters that are not allowed in stored file names
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
 def clean_filename(filename: str) -> str:
     """
     Clean filename for safe file system storage
@@ -100,13 +114,11 @@ def clean_filename(filename: str) -> str:
     Returns:
         Cleaned filename
     """
-    # Remove or replace problematic characters
-    import re
-    # Replace problematic characters with underscores
-    cleaned = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    # Remove extra spaces and trim
-    cleaned = ' '.join(cleaned.split())
-    return cleaned
+    # Replace problematic characters with underscores, collapse extra spaces and trim
+    return ' '.join(_UNSAFE_FILENAME_CHARS.sub('_', filename).split())
+
+# (unit label, power-of-two shift) for file sizes
+_SIZE_UNITS = (("B", 0), ("KB", 10), ("MB", 20), ("GB", 30))
 
 def get_file_size_display(size_bytes: int) -> str:
     """
@@ -120,12 +132,10 @@ def get_file_size_display(size_bytes: int) -> str:
     """
     if size_bytes < 1024:
         return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.1f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
-    else:
-        return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+    
+    # Each unit spans 10 bits; GB is the largest unit shown
+    unit, shift = _SIZE_UNITS[min((size_bytes.bit_length() - 1) // 10, 3)]
+    return f"{size_bytes / (1 << shift):.1f} {unit}"
 
 def create_download_button(file_content: bytes, filename: str, mime_type: str = "application/octet-stream") -> bool:
     """
@@ -171,8 +181,9 @@ def display_user_card(user, show_admin_actions: bool = False):
             st.write(f"Conversions: {user.conversion_count}")
         
         with col3:
-            st.write(f"Last Login: {format_datetime(user.last_login)}")
-            st.write(f"Member Since: {format_datetime(user.created_at)}")
+            now = datetime.now()
+            st.write(f"Last Login: {format_datetime(user.last_login_dt, now)}")
+            st.write(f"Member Since: {format_datetime(user.created_at_dt, now)}")
         
         if show_admin_actions and user.role != "admin":
             col1, col2, col3 = st.columns([1, 1, 2])
@@ -186,6 +197,56 @@ def display_user_card(user, show_admin_actions: bool = False):
     st.divider()
     return None, None
 
+def render_user_table(users: List[Any], key: Optional[str] = None) -> List[Any]:
+    """
+    Display users as a single table instead of one card per user
+    
+    Args:
+        users: User objects to display
+        key: Widget key; when given, rows can be selected
+        
+    Returns:
+        The selected users (empty if the table is not selectable)
+    """
+    now = datetime.now()
+    rows = [
+        {
+            "ID": user.id,
+            "Username": user.username,
+            "Role": user.role.title(),
+            "Conversions": user.conversion_count,
+            "Last Login": format_datetime(user.last_login_dt, now),
+            "Member Since": format_datetime(user.created_at_dt, now)
+        }
+        for user in users
+    ]
+    
+    # The ID column only maps selected rows back to users
+    column_config = {"ID": None}
+    if key is None:
+        st.dataframe(rows, use_container_width=True, hide_index=True, column_config=column_config)
+        return []
+    
+    # Selected row positions refer to the rows shown when the selection was made,
+    # which may differ from this run's rows if users were added or removed since
+    ids_key = f"{key}_row_ids"
+    row_ids = [user.id for user in users]
+    shown_ids = st.session_state.get(ids_key, row_ids)
+    st.session_state[ids_key] = row_ids
+    
+    event = st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config=column_config,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=key
+    )
+    users_by_id = {user.id: user for user in users}
+    selected_ids = (shown_ids[i] for i in event.selection.rows if 0 <= i < len(shown_ids))
+    return [users_by_id[user_id] for user_id in selected_ids if user_id in users_by_id]
+
 def show_loading_spinner(message: str = "Loading..."):
     """
     Show loading spinner with message
@@ -196,29 +257,55 @@ def show_loading_spinner(message: str = "Loading..."):
     with st.spinner(message):
         return True
 
-def init_session_state_defaults():
-    """Initialize default session state values"""
-    defaults = {
-        "step": 1,
-        "uploaded_file": None,
-        "selected_ticket": None,
-        "processing_status": None
-    }
+# Default session state for the conversion wizard
+_WIZARD_DEFAULTS = {
+    "step": 1,
+    "uploaded_file": None,
+    "selected_ticket": None,
+    "processing_status": None
+}
+
+def init_session_state_defaults(defaults: Optional[Dict[str, Any]] = None):
+    """
+    Initialize default session state values
     
-    for key, value in defaults.items():
-        if key not in st.session_state:
-            st.session_state[key] = value
+    Args:
+        defaults: Key -> default value mapping (wizard defaults if None)
+    """
+    for key, value in (defaults or _WIZARD_DEFAULTS).items():
+        st.session_state.setdefault(key, value)
+
+def navigate_to(page: str):
+    """
+    Button on_click callback that switches the routed page
+    
+    Runs before the click's own rerun, so that rerun already renders the
+    target page without a second st.rerun().
+    
+    Args:
+        page: Value for the "page" query parameter
+    """
+    st.query_params.page = page
 
 def reset_wizard_state():
     """Reset wizard state to beginning"""
-    wizard_keys = ["step", "uploaded_file", "selected_ticket", "processing_status"]
-    for key in wizard_keys:
-        if key in st.session_state:
-            del st.session_state[key]
+    for key in _WIZARD_DEFAULTS:
+        st.session_state.pop(key, None)
     
     # Reinitialize defaults
     init_session_state_defaults()
 
+# Environment variables reported by get_environment_status
+_REQUIRED_ENV_VARS = ("REDMINE_URL", "JWT_SECRET_KEY", "SQLITE_DB_PATH")
+_OPTIONAL_ENV_VARS = ("REDMINE_API_KEY", "DEFAULT_PROJECT_ID", "TEMP_FILES_PATH", "MAX_FILE_SIZE_MB")
+
+def _env_var_status(value: Optional[str]) -> Dict[str, Any]:
+    """Set flag and truncated preview for one environment variable value"""
+    return {
+        "set": bool(value),
+        "value": f"{value[:10]}..." if value and len(value) > 10 else value
+    }
+
 def get_environment_status() -> Dict[str, Any]:
     """
     Get environment configuration status for admin dashboard
@@ -226,34 +313,12 @@ def get_environment_status() -> Dict[str, Any]:
     Returns:
         Dictionary with environment status information
     """
-    required_env_vars = [
-        "REDMINE_URL", "JWT_SECRET_KEY", "SQLITE_DB_PATH"
-    ]
-    
-    optional_env_vars = [
-        "REDMINE_API_KEY", "DEFAULT_PROJECT_ID", "TEMP_FILES_PATH", "MAX_FILE_SIZE_MB"
-    ]
-    
-    status = {
-        "required": {},
-        "optional": {},
-        "all_required_set": True
-    }
-    
-    for var in required_env_vars:
-        value = os.getenv(var)
-        status["required"][var] = {
-            "set": bool(value),
-            "value": value[:10] + "..." if value and len(value) > 10 else value
-        }
-        if not value:
-            status["all_required_set"] = False
-    
-    for var in optional_env_vars:
-        value = os.getenv(var)
-        status["optional"][var] = {
-            "set": bool(value),
-            "value": value[:10] + "..." if value and len(value) > 10 else value
-        }
+    environ = os.environ
+    required = {var: _env_var_status(environ.get(var)) for var in _REQUIRED_ENV_VARS}
+    optional = {var: _env_var_status(environ.get(var)) for var in _OPTIONAL_ENV_VARS}
     
-    return status 
\ No newline at end of file
+    return {
+        "required": required,
+        "optional": optional,
+        "all_required_set": all(entry["set"] for entry in required.values())
+    } 
\ No newline at end of file
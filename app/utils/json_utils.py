@@ -0,0 +1,28 @@
+"""
+JSON helpers for the CV Converter Web Application
+Uses orjson when installed and falls back to the standard library otherwise
+"""
+
+from typing import Any, Union
+
+try:
+    import orjson
+
+    def json_loads(data: Union[bytes, str]) -> Any:
+        """Parse JSON from bytes or str"""
+        return orjson.loads(data)
+
+    def json_dumps(obj: Any) -> str:
+        """Serialize object to a JSON string"""
+        return orjson.dumps(obj).decode("utf-8")
+
+except ImportError:
+    import json
+
+    def json_loads(data: Union[bytes, str]) -> Any:
+        """Parse JSON from bytes or str"""
+        return json.loads(data)
+
+    def json_dumps(obj: Any) -> str:
+        """Serialize object to a JSON string"""
+        return json.dumps(obj)
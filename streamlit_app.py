@@ -5,10 +5,9 @@ Handles routing, authentication, and page management
 
 import streamlit as st
 import os
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (once per process, not on every rerun)
+from app.auth import _env
 
 # Configure Streamlit page
 st.set_page_config(
@@ -19,13 +18,44 @@ st.set_page_config(
 )
 
 # Import application modules
-from app.auth.auth_service import AuthService
+from app.auth.auth_service import get_auth_service
 from app.pages.login import show_login_page
 from app.pages.dashboard import show_dashboard
 from app.pages.admin_users import show_admin_users
 from app.pages.admin_settings import show_admin_settings
 from app.pages.tickets import show_tickets_page
-from app.utils.helpers import init_session_state_defaults
+from app.utils.helpers import init_session_state_defaults, navigate_to
+
+# Hides the Streamlit menu, footer and header, plus custom app styling
+_APP_CSS = """
+    <style>
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+    .stApp {
+        background-color: #f5f5f5;
+    }
+    .main .block-container {
+        padding-top: 2rem;
+        padding-bottom: 2rem;
+    }
+    </style>
+"""
+
+def show_converter_placeholder():
+    """Placeholder until the CV converter page is implemented"""
+    st.info("🔄 CV Converter page coming soon!")
+    st.button("← Back to Dashboard", on_click=navigate_to, args=("dashboard",))
+
+# Page name -> (page function, admin required)
+_ROUTES = {
+    "login": (show_dashboard, False),
+    "dashboard": (show_dashboard, False),
+    "admin_users": (show_admin_users, True),
+    "admin_settings": (show_admin_settings, True),
+    "tickets": (show_tickets_page, False),
+    "converter": (show_converter_placeholder, False)
+}
 
 def main():
     """Main application function with routing logic"""
@@ -34,7 +64,7 @@ def main():
     init_session_state_defaults()
     
     # Initialize authentication service
-    auth_service = AuthService()
+    auth_service = get_auth_service()
     
     # Check authentication status
     current_user = auth_service.get_current_user()
@@ -51,28 +81,8 @@ def main():
     if st.session_state.current_page != page:
         st.session_state.current_page = page
     
-    # Hide Streamlit menu and footer for cleaner UI
-    hide_streamlit_style = """
-        <style>
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        header {visibility: hidden;}
-        </style>
-    """
-    st.markdown(hide_streamlit_style, unsafe_allow_html=True)
-    
-    # Custom CSS for better styling
-    st.markdown("""
-        <style>
-        .stApp {
-            background-color: #f5f5f5;
-        }
-        .main .block-container {
-            padding-top: 2rem;
-            padding-bottom: 2rem;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    # Hide Streamlit menu/footer and apply custom styling in one element
+    st.markdown(_APP_CSS, unsafe_allow_html=True)
     
     # Route to appropriate page based on authentication and page parameter
     try:
@@ -81,44 +91,22 @@ def main():
             show_login_page()
         else:
             # Route authenticated users to appropriate pages
-            if page == "dashboard" or page == "login":
-                show_dashboard()
-            
-            elif page == "admin_users":
-                # Check admin privileges
-                if current_user.role == "admin":
-                    show_admin_users()
-                else:
-                    st.error("🚫 Admin access required")
-                    st.info("Redirecting to dashboard...")
-                    st.query_params.page = "dashboard"
-                    st.rerun()
-            
-            elif page == "admin_settings":
-                # Check admin privileges
-                if current_user.role == "admin":
-                    show_admin_settings()
-                else:
-                    st.error("🚫 Admin access required")
-                    st.info("Redirecting to dashboard...")
-                    st.query_params.page = "dashboard"
-                    st.rerun()
-            
-            elif page == "tickets":
-                show_tickets_page()
-            
-            elif page == "converter":
-                st.info("🔄 CV Converter page coming soon!")
-                if st.button("← Back to Dashboard"):
-                    st.query_params.page = "dashboard"
-                    st.rerun()
-            
-            else:
+            route = _ROUTES.get(page)
+            if route is None:
                 # Unknown page, redirect to dashboard
                 st.error("🔍 Page not found")
                 st.info("Redirecting to dashboard...")
                 st.query_params.page = "dashboard"
                 st.rerun()
+            
+            show_page, admin_required = route
+            if admin_required and current_user.role != "admin":
+                st.error("🚫 Admin access required")
+                st.info("Redirecting to dashboard...")
+                st.query_params.page = "dashboard"
+                st.rerun()
+            
+            show_page()
                 
     except Exception as e:
         st.error(f"Application error: {e}")
@@ -133,9 +121,7 @@ def main():
         
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("🏠 Go to Dashboard"):
-                st.query_params.page = "dashboard"
-                st.rerun()
+            st.button("🏠 Go to Dashboard", on_click=navigate_to, args=("dashboard",))
         
         with col2:
             if st.button("🔓 Logout"):